@@ -8,96 +8,217 @@ import json
 import re
 import os
 import sys
-import queue
+import selectors
+import shutil
+import signal
 import subprocess
-import threading
+import tempfile
 import time
 import argparse
-from typing import Generator, List, Optional
+from functools import lru_cache
+from typing import Callable, Generator, List, Optional, Union
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; stdlib json works everywhere
+    orjson = None
+
+# ANSI escape codes
+BOLD = "\033[1m"
+DIM = "\033[2m"
+CYAN = "\033[36m"
+YELLOW = "\033[33m"
+GREEN = "\033[32m"
+RED = "\033[31m"
+RESET = "\033[0m"
+
+# Markdown-to-ANSI: one combined pattern so each snippet is scanned once
+# instead of once per style, and nothing is recompiled per call.
+_MD_RE = re.compile(
+    r'(\*\*|__)(?P<b>.+?)\1'             # **bold** or __bold__
+    r'|(?<!\w)[*_](?P<i>.+?)[*_](?!\w)'  # *italic* (not inside words)
+    r'|`(?P<c>.+?)`'                     # `code`
+    r'|^(?P<hl>#{1,6})\s+(?P<h>.+)$',    # headings
+    re.MULTILINE,
+)
+
+_HEADING_STYLES = {
+    1: f'{BOLD}{CYAN}',    # h1: bold cyan
+    2: f'{BOLD}{YELLOW}',  # h2: bold yellow
+    3: f'{BOLD}{GREEN}',   # h3: bold green
+}
+
+_RECONNECT_RE = re.compile(r'^Reconnecting\.\.\.\s+\d+/\d+$')
+
+# Shared empty dict so events without an "item" don't allocate one each
+_EMPTY: dict = {}
+
+# Characters whose absence lets fmt_snippet skip markdown conversion
+_MD_CHARS = ("*", "_", "`", "#")
+_SHELL_WRAP_RE = re.compile(r"""(?:bash|sh|zsh)\s+-\w*c\s+['"](.+?)['"](?:\s*\))?$""")
+
+
+def _md_repl(m) -> str:
+    if m.group("b") is not None:
+        return f'{BOLD}{m.group("b")}{RESET}'
+    if m.group("i") is not None:
+        return f'{DIM}{m.group("i")}{RESET}'
+    if m.group("c") is not None:
+        return f'{CYAN}{m.group("c")}{RESET}'
+    style = _HEADING_STYLES.get(len(m.group("hl")), BOLD)
+    return f'\n{style}{m.group("h")}{RESET}'
+
+
+def strip_md(text: str) -> str:
+    """Convert common markdown to ANSI terminal styles in a single pass."""
+    return _MD_RE.sub(_md_repl, text)
+
+
+def _loads(raw: Union[str, bytes]) -> dict:
+    """Parse one JSON event line (orjson when available, stdlib otherwise)."""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def _dumps(obj) -> bytes:
+    """Serialize one event compactly to UTF-8 bytes."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _signal_tree(process: subprocess.Popen, sig: int) -> None:
+    """Signal the whole codex process group, falling back to the child only."""
+    try:
+        os.killpg(process.pid, sig)
+    except OSError:
+        try:
+            process.send_signal(sig)
+        except OSError:
+            pass
+
+
+@lru_cache(maxsize=1)
+def _resolve_codex() -> str:
+    """Locate the codex executable once per process.
 
+    Saves Popen a PATH walk on every invocation and keeps the resolution
+    stable for the lifetime of the bridge.
+    """
+    return shutil.which("codex") or "codex"
 
-def run_shell_command(cmd: List[str], timeout: Optional[int] = None) -> Generator[str, None, None]:
-    """Execute a command and stream its output line-by-line with optional timeout."""
+
+def run_shell_command(
+    cmd: List[str],
+    timeout: Optional[int] = None,
+    on_block: Optional[Callable[[], None]] = None,
+) -> Generator[Union[dict, str], None, None]:
+    """Execute a command and stream its output with optional timeout.
+
+    Reads the subprocess pipe directly via selectors (no reader thread, no
+    queue), so events are yielded as soon as they arrive and the timeout is
+    enforced against an absolute monotonic deadline. Yields each JSON event
+    line parsed once as a dict; lines that fail to decode are yielded as
+    raw strings so the caller can report them. `on_block` is invoked right
+    before the loop blocks in select(), letting the caller drain buffered
+    progress output exactly when nothing else is happening.
+    """
     process = subprocess.Popen(
         cmd,
         shell=False,
         stdin=subprocess.DEVNULL,
         stdout=subprocess.PIPE,
         stderr=subprocess.STDOUT,
-        universal_newlines=True,
-        encoding='utf-8',
-        errors='replace',
+        bufsize=0,
+        start_new_session=True,
     )
 
-    output_queue: queue.Queue[Optional[str]] = queue.Queue()
     GRACEFUL_SHUTDOWN_DELAY = 0.3
-    start_time = time.time()
+    deadline = time.monotonic() + timeout if timeout else None
     timed_out = False
+    completed = False
+
+    fd = process.stdout.fileno()
+    os.set_blocking(fd, False)
+    sel = selectors.DefaultSelector()
+    sel.register(process.stdout, selectors.EVENT_READ)
+    buf = bytearray()
+
+    while not completed:
+        if deadline is not None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                timed_out = True
+                break
+        else:
+            remaining = None
 
-    def is_turn_completed(line: str) -> bool:
-        try:
-            data = json.loads(line)
-            return data.get("type") == "turn.completed"
-        except (json.JSONDecodeError, AttributeError, TypeError):
-            return False
-
-    def read_output() -> None:
-        if process.stdout:
-            for line in iter(process.stdout.readline, ""):
-                stripped = line.strip()
-                output_queue.put(stripped)
-                if is_turn_completed(stripped):
-                    time.sleep(GRACEFUL_SHUTDOWN_DELAY)
-                    process.terminate()
-                    break
-            process.stdout.close()
-        output_queue.put(None)
-
-    thread = threading.Thread(target=read_output)
-    thread.start()
-
-    while True:
-        # Check timeout
-        if timeout and (time.time() - start_time) > timeout:
-            timed_out = True
-            try:
-                process.terminate()
-                time.sleep(2)
-                if process.poll() is None:
-                    process.kill()
-            except:
-                pass
-            break
+        if on_block is not None:
+            on_block()
 
-        try:
-            line = output_queue.get(timeout=0.5)
-            if line is None:
+        if not sel.select(timeout=remaining):
+            # select() timed out: re-check the deadline / process liveness
+            if process.poll() is not None:
                 break
-            yield line
-        except queue.Empty:
-            if process.poll() is not None and not thread.is_alive():
+            continue
+
+        try:
+            chunk = os.read(fd, 65536)
+        except BlockingIOError:
+            continue
+        if not chunk:
+            break  # EOF
+
+        buf.extend(chunk)
+        while True:
+            nl = buf.find(b"\n")
+            if nl == -1:
                 break
+            raw = bytes(buf[:nl]).strip()
+            del buf[:nl + 1]
+            if not raw:
+                continue
+            try:
+                event = _loads(raw)
+            except ValueError:
+                # Undecodable line: pass the raw string through for reporting
+                yield raw.decode("utf-8", "replace")
+                continue
+            yield event
+            if isinstance(event, dict) and event.get("type") == "turn.completed":
+                completed = True
+        if completed:
+            time.sleep(GRACEFUL_SHUTDOWN_DELAY)
+            _signal_tree(process, signal.SIGTERM)
+
+    sel.close()
 
     if timed_out:
-        yield json.dumps({
+        _signal_tree(process, signal.SIGTERM)
+        time.sleep(2)
+        if process.poll() is None:
+            _signal_tree(process, signal.SIGKILL)
+        yield {
             "type": "timeout",
             "error": {"message": f"Codex execution exceeded {timeout}s timeout limit"}
-        })
+        }
+
+    # Flush any trailing output left in the accumulator (no final newline)
+    tail = bytes(buf).strip()
+    if tail:
+        try:
+            yield _loads(tail)
+        except ValueError:
+            yield tail.decode("utf-8", "replace")
 
     try:
         process.wait(timeout=5)
     except subprocess.TimeoutExpired:
         process.kill()
         process.wait()
-    thread.join(timeout=5)
-
-    while not output_queue.empty():
-        try:
-            line = output_queue.get_nowait()
-            if line is not None:
-                yield line
-        except queue.Empty:
-            break
+    if process.stdout:
+        process.stdout.close()
 
 
 def main():
@@ -123,51 +244,30 @@ def main():
     args = parser.parse_args()
 
     _tty = None
+    _tty_buf = bytearray()
     if not args.no_progress:
         try:
-            _tty = open("/dev/tty", "w", buffering=1)  # line-buffered
+            _tty = open("/dev/tty", "wb", buffering=0)
         except (OSError, FileNotFoundError):
             _tty = None  # CI/CD or no controlling terminal: silent fallback
 
-    def progress(msg: str) -> None:
-        if _tty is None:
+    def flush_progress() -> None:
+        if _tty is None or not _tty_buf:
             return
         try:
-            _tty.write(msg + "\n")
-            _tty.flush()
+            _tty.write(_tty_buf)
         except OSError:
             pass  # terminal closed: silently ignore
+        _tty_buf.clear()
 
-    # ANSI escape codes
-    BOLD = "\033[1m"
-    DIM = "\033[2m"
-    CYAN = "\033[36m"
-    YELLOW = "\033[33m"
-    GREEN = "\033[32m"
-    RED = "\033[31m"
-    RESET = "\033[0m"
-
-    def strip_md(text: str) -> str:
-        """Convert common markdown to ANSI terminal styles."""
-        # **bold** or __bold__ → ANSI bold
-        text = re.sub(r'\*\*(.+?)\*\*', rf'{BOLD}\1{RESET}', text)
-        text = re.sub(r'__(.+?)__', rf'{BOLD}\1{RESET}', text)
-        # *italic* or _italic_ (but not inside words like file_name)
-        text = re.sub(r'(?<!\w)\*(.+?)\*(?!\w)', rf'{DIM}\1{RESET}', text)
-        # `code` → cyan
-        text = re.sub(r'`(.+?)`', rf'{CYAN}\1{RESET}', text)
-        # headings → different styles by level
-        _heading_styles = {
-            1: f'{BOLD}{CYAN}',    # h1: bold cyan
-            2: f'{BOLD}{YELLOW}',  # h2: bold yellow
-            3: f'{BOLD}{GREEN}',   # h3: bold green
-        }
-        def _heading_repl(m):
-            level = len(m.group(1))
-            style = _heading_styles.get(level, BOLD)
-            return f'\n{style}{m.group(2)}{RESET}'
-        text = re.sub(r'^(#{1,6})\s+(.+)$', _heading_repl, text, flags=re.MULTILINE)
-        return text
+    def progress(msg: str) -> None:
+        if _tty is None:
+            return
+        _tty_buf.extend(msg.encode("utf-8", "replace"))
+        _tty_buf.extend(b"\n")
+        # Amortize write(2) syscalls: drain roughly once per 4 KiB batch
+        if len(_tty_buf) > 4096:
+            flush_progress()
 
     def fmt_args(raw: str) -> str:
         try:
@@ -180,18 +280,23 @@ def main():
 
     def fmt_snippet(text: str) -> str:
         """Convert markdown to ANSI, collapse horizontal whitespace, preserve line breaks."""
+        # Fast path: plain single-line snippets (the common streaming case)
+        # need neither the regex pass nor the whitespace rebuild
+        if ("\n" not in text and "\t" not in text and "  " not in text
+                and not any(c in text for c in _MD_CHARS)):
+            return text
         text = strip_md(text)
         lines = [' '.join(line.split()) for line in text.splitlines()]
         return '\n'.join(line for line in lines if line)
 
     def unwrap_shell(cmd_str: str) -> str:
         """Extract the innermost command from shell wrappers like /bin/zsh -lc 'bash -lc ...'."""
-        m = re.search(r"""(?:bash|sh|zsh)\s+-\w*c\s+['"](.+?)['"](?:\s*\))?$""", cmd_str)
+        m = _SHELL_WRAP_RE.search(cmd_str)
         if m:
             return unwrap_shell(m.group(1))
         return cmd_str
 
-    cmd = ["codex", "exec", "--sandbox", args.sandbox, "--cd", args.cd, "--json"]
+    cmd = [_resolve_codex(), "exec", "--sandbox", args.sandbox, "--cd", args.cd, "--json"]
 
     if args.image:
         cmd.extend(["--image", ",".join(args.image)])
@@ -214,101 +319,128 @@ def main():
     cmd += ['--', args.PROMPT]
 
     # Execution Logic
-    all_messages = []
-    agent_messages = ""
+    # Spool events to a temp file instead of keeping them in memory; only
+    # needed when --return-all-messages is set.
+    spool = tempfile.TemporaryFile() if args.return_all_messages else None
+    agent_parts: list[str] = []
     success = True
     err_message = ""
     thread_id = None
     timeout_val = None if args.timeout == 0 else args.timeout
     _session_shown = False
-    _start_time = time.time()
+    _start_time = time.monotonic()
 
     def elapsed() -> str:
-        return f"{int(time.time() - _start_time)}s"
-
-    for line in run_shell_command(cmd, timeout=timeout_val):
+        return f"{int(time.monotonic() - _start_time)}s"
+
+    # Per-item-type handlers, built once so the hot loop is a dict lookup
+    # instead of an elif chain re-doing .get() calls per branch.
+    def _on_agent_message(item: dict) -> None:
+        text = item.get("text", "")
+        agent_parts.append(text)
+        if text:
+            progress(f"{DIM}[codex]{RESET} {BOLD}Responding:{RESET} {fmt_snippet(text)}")
+        else:
+            progress(f"{DIM}[codex]{RESET} {BOLD}Responding...{RESET}")
+
+    def _on_function_call(item: dict) -> None:
+        name = item.get("name", "?")
+        raw_args = item.get("arguments", "{}")
+        progress(f"{DIM}[codex]{RESET} {GREEN}>>{RESET} {name}({fmt_args(raw_args)})")
+
+    def _on_function_call_output(item: dict) -> None:
+        output = item.get("output", "") or item.get("content", "") or item.get("result", "")
+        if output:
+            progress(f"{DIM}[codex]{RESET} {YELLOW}<<{RESET} {fmt_snippet(str(output))}")
+        else:
+            progress(f"{DIM}[codex]{RESET} {YELLOW}<<{RESET} {DIM}(no output){RESET}")
+
+    def _on_command_execution(item: dict) -> None:
+        cmd_str = item.get("command", "")
+        agg_output = item.get("aggregated_output", "")
+        if agg_output:
+            # completed: show output
+            exit_code = item.get("exit_code", "")
+            if exit_code and str(exit_code) != "0":
+                prefix = f"{RED}<< (exit={exit_code}){RESET} "
+            else:
+                prefix = f"{YELLOW}<<{RESET} "
+            progress(f"{DIM}[codex]{RESET} {prefix}{fmt_snippet(str(agg_output))}")
+        elif cmd_str:
+            # started: show command (unwrap shell wrappers)
+            progress(f"{DIM}[codex]{RESET} {GREEN}>>{RESET} shell({fmt_snippet(unwrap_shell(str(cmd_str)))})")
+
+    def _on_reasoning(item: dict) -> None:
+        text = item.get("text", "") or item.get("content", "")
+        if text:
+            progress(f"{DIM}[codex]{RESET} {DIM}Thinking:{RESET} {fmt_snippet(text)}")
+        else:
+            progress(f"{DIM}[codex]{RESET} {DIM}Thinking...{RESET}")
+
+    item_handlers = {
+        "agent_message": _on_agent_message,
+        "function_call": _on_function_call,
+        "function_call_output": _on_function_call_output,
+        "command_execution": _on_command_execution,
+        "reasoning": _on_reasoning,
+    }
+
+    for line_dict in run_shell_command(cmd, timeout=timeout_val, on_block=flush_progress):
+        if isinstance(line_dict, str):
+            # Raw line that failed to decode upstream
+            err_message += "\n\n[json decode error] " + line_dict
+            continue
         try:
-            line_dict = json.loads(line.strip())
-            all_messages.append(line_dict)
+            if spool is not None:
+                if spool.tell():
+                    spool.write(b",")
+                spool.write(_dumps(line_dict))
+
+            top_type = line_dict.get("type", "")
 
             # Handle timeout
-            if line_dict.get("type") == "timeout":
+            if top_type == "timeout":
                 progress(f"{DIM}[codex]{RESET} {RED}Timed out after {args.timeout}s{RESET}")
                 success = False
                 err_message = f"[TIMEOUT] Execution exceeded {args.timeout}s limit. "
                 err_message += "Try increasing timeout with --timeout 1200 (20 minutes)."
-                if agent_messages:
-                    err_message += f"\n\nPartial results: {agent_messages[:200]}"
+                if agent_parts:
+                    err_message += f"\n\nPartial results: {''.join(agent_parts)[:200]}"
                 break
 
-            item = line_dict.get("item", {})
+            item = line_dict.get("item") or _EMPTY
             item_type = item.get("type", "")
-            if item_type == "agent_message":
-                text = item.get("text", "")
-                agent_messages = agent_messages + text
-                if text:
-                    progress(f"{DIM}[codex]{RESET} {BOLD}Responding:{RESET} {fmt_snippet(text)}")
-                else:
-                    progress(f"{DIM}[codex]{RESET} {BOLD}Responding...{RESET}")
-            elif item_type == "function_call":
-                name = item.get("name", "?")
-                raw_args = item.get("arguments", "{}")
-                progress(f"{DIM}[codex]{RESET} {GREEN}>>{RESET} {name}({fmt_args(raw_args)})")
-            elif item_type == "function_call_output":
-                output = item.get("output", "") or item.get("content", "") or item.get("result", "")
-                if output:
-                    progress(f"{DIM}[codex]{RESET} {YELLOW}<<{RESET} {fmt_snippet(str(output))}")
-                else:
-                    progress(f"{DIM}[codex]{RESET} {YELLOW}<<{RESET} {DIM}(no output){RESET}")
-            elif item_type == "command_execution":
-                cmd_str = item.get("command", "")
-                agg_output = item.get("aggregated_output", "")
-                if agg_output:
-                    # completed: show output
-                    exit_code = item.get("exit_code", "")
-                    if exit_code and str(exit_code) != "0":
-                        prefix = f"{RED}<< (exit={exit_code}){RESET} "
-                    else:
-                        prefix = f"{YELLOW}<<{RESET} "
-                    progress(f"{DIM}[codex]{RESET} {prefix}{fmt_snippet(str(agg_output))}")
-                elif cmd_str:
-                    # started: show command (unwrap shell wrappers)
-                    progress(f"{DIM}[codex]{RESET} {GREEN}>>{RESET} shell({fmt_snippet(unwrap_shell(str(cmd_str)))})")
-            elif item_type == "reasoning":
-                text = item.get("text", "") or item.get("content", "")
-                if text:
-                    progress(f"{DIM}[codex]{RESET} {DIM}Thinking:{RESET} {fmt_snippet(text)}")
-                else:
-                    progress(f"{DIM}[codex]{RESET} {DIM}Thinking...{RESET}")
-            else:
+            handler = item_handlers.get(item_type)
+            if handler is not None:
+                handler(item)
+            elif item_type:
                 # catch-all: print any unrecognized item type
-                if item_type:
-                    snippet = item.get("text", "") or item.get("content", "") or item.get("output", "")
-                    if snippet:
-                        progress(f"{DIM}[codex]{RESET} {DIM}[{item_type}]{RESET} {fmt_snippet(str(snippet))}")
-                    else:
-                        # dump item keys to help debug unknown item structures
-                        keys = [k for k in item.keys() if k != "type"]
-                        progress(f"{DIM}[codex]{RESET} {DIM}[{item_type}] keys={keys}{RESET}")
-            if line_dict.get("thread_id") is not None:
-                thread_id = line_dict.get("thread_id")
+                snippet = item.get("text", "") or item.get("content", "") or item.get("output", "")
+                if snippet:
+                    progress(f"{DIM}[codex]{RESET} {DIM}[{item_type}]{RESET} {fmt_snippet(str(snippet))}")
+                else:
+                    # dump item keys to help debug unknown item structures
+                    keys = [k for k in item.keys() if k != "type"]
+                    progress(f"{DIM}[codex]{RESET} {DIM}[{item_type}] keys={keys}{RESET}")
+            new_thread_id = line_dict.get("thread_id")
+            if new_thread_id is not None:
+                thread_id = new_thread_id
                 if not _session_shown:
                     progress(f"{DIM}[codex]{RESET} Session: {CYAN}{thread_id[:8]}...{RESET}")
                     _session_shown = True
-            top_type = line_dict.get("type", "")
             if top_type == "turn.completed":
                 progress(f"{DIM}[codex]{RESET} {GREEN}Done.{RESET} ({elapsed()})")
             elif "fail" in top_type:
-                success = False if len(agent_messages) == 0 else success
+                success = False if not agent_parts else success
                 fail_msg = line_dict.get("error", {}).get("message", "")
                 progress(f"{DIM}[codex]{RESET} {RED}Error:{RESET} {fail_msg[:60]}")
                 err_message += "\n\n[codex error] " + fail_msg
             elif "error" in top_type:
                 error_msg = line_dict.get("message", "")
-                is_reconnecting = bool(re.match(r'^Reconnecting\.\.\.\s+\d+/\d+$', error_msg))
+                is_reconnecting = bool(_RECONNECT_RE.match(error_msg))
 
                 if not is_reconnecting:
-                    success = False if len(agent_messages) == 0 else success
+                    success = False if not agent_parts else success
                     progress(f"{DIM}[codex]{RESET} {RED}Error:{RESET} {error_msg[:60]}")
                     err_message += "\n\n[codex error] " + error_msg
             elif top_type and top_type not in ("item.created", "item.updated", "item.completed",
@@ -318,12 +450,8 @@ def main():
                 # catch-all: print unrecognized top-level type for debugging
                 progress(f"[codex] [{top_type}]")
 
-        except json.JSONDecodeError:
-            err_message += "\n\n[json decode error] " + line
-            continue
-
         except Exception as error:
-            err_message += "\n\n[unexpected error] " + f"Unexpected error: {error}. Line: {line!r}"
+            err_message += "\n\n[unexpected error] " + f"Unexpected error: {error}. Line: {line_dict!r}"
             success = False
             break
 
@@ -331,6 +459,8 @@ def main():
         success = False
         err_message = "Failed to get `SESSION_ID` from the codex session. \n\n" + err_message
 
+    agent_messages = "".join(agent_parts)
+
     if len(agent_messages) == 0 and success:
         success = False
         err_message = "Failed to get `agent_messages` from the codex session. \n\n You can try to set `return_all_messages` to `True` to get the full reasoning information. " + err_message
@@ -348,11 +478,21 @@ def main():
         if thread_id:
             result["SESSION_ID"] = thread_id
 
-    if args.return_all_messages:
-        result["all_messages"] = all_messages
-
-    print(json.dumps(result, indent=2, ensure_ascii=False))
-
+    if spool is None:
+        print(json.dumps(result, indent=2, ensure_ascii=False))
+    else:
+        # Splice the spooled events into the output without re-materializing
+        # them: emit the scalar fields, then copy the raw JSON array body.
+        out = sys.stdout.buffer
+        out.write(json.dumps(result, ensure_ascii=False).encode("utf-8")[:-1])
+        out.write(b', "all_messages": [')
+        spool.seek(0)
+        shutil.copyfileobj(spool, out)
+        out.write(b"]}\n")
+        out.flush()
+        spool.close()
+
+    flush_progress()
     if _tty is not None:
         try:
             _tty.close()
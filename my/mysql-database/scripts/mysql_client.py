@@ -8,7 +8,34 @@ import json
 import sys
 from typing import Dict, List, Any, Optional
 import pymysql
-from pymysql.cursors import DictCursor
+from pymysql.constants import CLIENT
+from pymysql.cursors import DictCursor, SSDictCursor
+
+try:
+    import orjson
+except ImportError:  # optional speedup; stdlib json is the fallback
+    orjson = None
+
+
+def dump_json(obj: Any) -> None:
+    """Pretty-print obj as JSON on stdout (orjson when available)."""
+    if orjson is not None:
+        sys.stdout.buffer.write(orjson.dumps(obj, option=orjson.OPT_INDENT_2, default=str))
+        sys.stdout.buffer.write(b'\n')
+    else:
+        print(json.dumps(obj, indent=2, default=str))
+
+
+def _is_select(query: str) -> bool:
+    """Cheap SELECT detection without upper-casing the whole query."""
+    return query.lstrip()[:6].upper() == 'SELECT'
+
+
+def _row_bytes(row: Dict[str, Any]) -> bytes:
+    """Serialize one streamed result row to compact JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(row, default=str)
+    return json.dumps(row, default=str).encode('utf-8')
 
 
 class MySQLClient:
@@ -29,7 +56,8 @@ class MySQLClient:
                 password=self.config['password'],
                 database=self.config.get('database'),
                 charset='utf8mb4',
-                cursorclass=DictCursor
+                cursorclass=DictCursor,
+                client_flag=CLIENT.MULTI_STATEMENTS
             )
             return True
         except Exception as e:
@@ -74,43 +102,70 @@ class MySQLClient:
             'create_statement': ''
         }
 
+        # Send all four inspection queries as one multi-statement batch so
+        # the call pays a single network round-trip instead of four.
+        # The whole batch goes through pymysql's %-format step (for the
+        # KEY_COLUMN_USAGE %s), so a literal % in the identifier must be
+        # doubled to survive it.
+        ident = table_name.replace('%', '%%')
+        batch = (
+            f"DESCRIBE `{ident}`; "
+            f"SHOW INDEX FROM `{ident}`; "
+            "SELECT "
+            "    CONSTRAINT_NAME, "
+            "    COLUMN_NAME, "
+            "    REFERENCED_TABLE_NAME, "
+            "    REFERENCED_COLUMN_NAME "
+            "FROM INFORMATION_SCHEMA.KEY_COLUMN_USAGE "
+            "WHERE TABLE_SCHEMA = DATABASE() "
+            "    AND TABLE_NAME = %s "
+            "    AND REFERENCED_TABLE_NAME IS NOT NULL; "
+            f"SHOW CREATE TABLE `{ident}`"
+        )
+
         with self.connection.cursor() as cursor:
-            # Get column information
-            cursor.execute(f"DESCRIBE `{table_name}`")
+            cursor.execute(batch, (table_name,))
             result['columns'] = cursor.fetchall()
 
-            # Get index information
-            cursor.execute(f"SHOW INDEX FROM `{table_name}`")
+            cursor.nextset()
             result['indexes'] = cursor.fetchall()
 
-            # Get foreign key information
-            cursor.execute(f"""
-                SELECT
-                    CONSTRAINT_NAME,
-                    COLUMN_NAME,
-                    REFERENCED_TABLE_NAME,
-                    REFERENCED_COLUMN_NAME
-                FROM INFORMATION_SCHEMA.KEY_COLUMN_USAGE
-                WHERE TABLE_SCHEMA = DATABASE()
-                    AND TABLE_NAME = %s
-                    AND REFERENCED_TABLE_NAME IS NOT NULL
-            """, (table_name,))
+            cursor.nextset()
             result['foreign_keys'] = cursor.fetchall()
 
-            # Get CREATE TABLE statement
-            cursor.execute(f"SHOW CREATE TABLE `{table_name}`")
+            cursor.nextset()
             row = cursor.fetchone()
             if row:
                 result['create_statement'] = list(row.values())[1]
 
         return result
 
-    def execute_query(self, query: str) -> Dict[str, Any]:
-        """Execute a SELECT query and return results."""
+    def execute_query(self, query: str, stream: bool = False) -> Dict[str, Any]:
+        """Execute a SELECT query and return results.
+
+        With stream=True, SELECT rows are fetched through an unbuffered
+        server-side cursor and written to stdout as NDJSON instead of being
+        materialized, keeping memory flat for large result sets.
+        """
+        if stream and _is_select(query):
+            with self.connection.cursor(SSDictCursor) as cursor:
+                cursor.execute(query)
+                columns = [desc[0] for desc in cursor.description] if cursor.description else []
+                row_count = 0
+                for row in cursor:
+                    sys.stdout.buffer.write(_row_bytes(row))
+                    sys.stdout.buffer.write(b'\n')
+                    row_count += 1
+                return {
+                    'row_count': row_count,
+                    'columns': columns,
+                    'streamed': True
+                }
+
         with self.connection.cursor() as cursor:
             cursor.execute(query)
 
-            if query.strip().upper().startswith('SELECT'):
+            if _is_select(query):
                 rows = cursor.fetchall()
                 return {
                     'rows': rows,
@@ -128,12 +183,13 @@ class MySQLClient:
 def load_config(config_path: str) -> Dict[str, Any]:
     """Load MySQL configuration from JSON file."""
     try:
-        with open(config_path, 'r') as f:
-            return json.load(f)
+        with open(config_path, 'rb') as f:
+            raw = f.read()
+        return orjson.loads(raw) if orjson is not None else json.loads(raw)
     except FileNotFoundError:
         print(f"Config file not found: {config_path}", file=sys.stderr)
         sys.exit(1)
-    except json.JSONDecodeError as e:
+    except ValueError as e:
         print(f"Invalid JSON in config file: {e}", file=sys.stderr)
         sys.exit(1)
 
@@ -146,7 +202,7 @@ def main():
         print("  list-databases", file=sys.stderr)
         print("  list-tables [database]", file=sys.stderr)
         print("  describe-table <table_name> [database]", file=sys.stderr)
-        print("  query <sql_query>", file=sys.stderr)
+        print("  query <sql_query> [--stream]", file=sys.stderr)
         sys.exit(1)
 
     config_file = sys.argv[1]
@@ -161,12 +217,12 @@ def main():
     try:
         if command == 'list-databases':
             databases = client.list_databases()
-            print(json.dumps({'databases': databases}, indent=2))
+            dump_json({'databases': databases})
 
         elif command == 'list-tables':
             database = sys.argv[3] if len(sys.argv) > 3 else None
             tables = client.list_tables(database)
-            print(json.dumps({'tables': tables}, indent=2))
+            dump_json({'tables': tables})
 
         elif command == 'describe-table':
             if len(sys.argv) < 4:
@@ -175,15 +231,20 @@ def main():
             table_name = sys.argv[3]
             database = sys.argv[4] if len(sys.argv) > 4 else None
             info = client.describe_table(table_name, database)
-            print(json.dumps(info, indent=2, default=str))
+            dump_json(info)
 
         elif command == 'query':
             if len(sys.argv) < 4:
                 print("Error: SQL query required", file=sys.stderr)
                 sys.exit(1)
             query = sys.argv[3]
-            result = client.execute_query(query)
-            print(json.dumps(result, indent=2, default=str))
+            stream = '--stream' in sys.argv[4:]
+            result = client.execute_query(query, stream=stream)
+            if result.get('streamed'):
+                # Rows already went to stdout as NDJSON; keep it clean
+                print(json.dumps(result, default=str), file=sys.stderr)
+            else:
+                dump_json(result)
 
         else:
             print(f"Unknown command: {command}", file=sys.stderr)
@@ -2,20 +2,105 @@
 """
 Get a specific configuration file from Nacos.
 """
-import argparse
+import gzip
 import json
+import random
+import ssl
 import sys
+import threading
+import time
 import urllib.request
 import urllib.error
-import urllib.parse
-from typing import Optional
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+from urllib.parse import quote
+
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:  # optional; stdlib json also parses bytes
+    orjson = None
+    _loads = json.loads
+
+try:
+    import requests
+except ImportError:  # optional; urllib works everywhere
+    requests = None
+
+# One pooled session per process: repeated fetches against the same Nacos
+# host reuse a persistent connection instead of re-handshaking
+if requests is not None:
+    _SESSION = requests.Session()
+    _adapter = requests.adapters.HTTPAdapter(pool_connections=10, pool_maxsize=32)
+    _SESSION.mount('http://', _adapter)
+    _SESSION.mount('https://', _adapter)
+else:
+    _SESSION = None
+
+
+class TTLCache:
+    """Small TTL + LRU cache for fetched configs.
+
+    Configs change rarely relative to how often they are read, so repeat
+    lookups within the TTL skip the HTTP round-trip entirely.
+    """
+
+    def __init__(self, maxsize: int = 256, ttl: float = 300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict = OrderedDict()
+
+    def get(self, key):
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if time.monotonic() >= expires_at:
+            # pop, not del: two threads can race past the expiry check
+            self._data.pop(key, None)
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key, value):
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+
+_CACHE = TTLCache()
+_CACHE_ENABLED = True
+
+# In-flight deduplication: concurrent fetches of the same key share one
+# HTTP round-trip instead of issuing N identical requests
+_INFLIGHT: dict = {}
+_INFLIGHT_LOCK = threading.Lock()
+
+# Transient server errors are retried with exponential backoff + jitter
+_MAX_RETRIES = 3
+_BACKOFF_BASE = 0.5
+_BACKOFF_CAP = 8.0
+_RETRYABLE_STATUS = (429, 500, 502, 503, 504)
+
+
+def _retry_delay(attempt: int, retry_after: Optional[str] = None) -> float:
+    """Seconds to sleep before the next attempt, honoring Retry-After."""
+    if retry_after:
+        try:
+            return min(float(retry_after), _BACKOFF_CAP)
+        except ValueError:
+            pass  # HTTP-date form; fall back to computed backoff
+    return min(_BACKOFF_CAP, _BACKOFF_BASE * 2 ** attempt) + random.random() * 0.1
 
 
 def get_config(
     base_url: str,
     namespace_id: str,
     data_id: str,
-    group_name: str = "DEFAULT_GROUP"
+    group_name: str = "DEFAULT_GROUP",
+    timeout: float = 10.0
 ) -> dict:
     """
     Get a specific configuration file from Nacos.
@@ -25,37 +110,104 @@ def get_config(
         namespace_id: Namespace ID
         data_id: Configuration data ID (e.g., application-local.yml)
         group_name: Group name (default: DEFAULT_GROUP)
+        timeout: Socket timeout in seconds for the HTTP request (default: 10)
 
     Returns:
         Dictionary containing the configuration content
     """
-    params = urllib.parse.urlencode({
-        'namespaceId': namespace_id,
-        'groupName': group_name,
-        'dataId': data_id
-    })
-    url = f"{base_url}/nacos/v3/admin/cs/config?{params}"
+    if not _CACHE_ENABLED:
+        return _fetch_config(base_url, namespace_id, data_id, group_name, timeout)
+
+    cache_key = (base_url, namespace_id, group_name, data_id)
+    cached = _CACHE.get(cache_key)
+    if cached is not None:
+        return cached
+
+    with _INFLIGHT_LOCK:
+        event = _INFLIGHT.get(cache_key)
+        leader = event is None
+        if leader:
+            event = threading.Event()
+            _INFLIGHT[cache_key] = event
+
+    if not leader:
+        # Another caller is already fetching this key; wait for its result
+        event.wait()
+        result = getattr(event, 'result', None)
+        if result is not None:
+            return result
+        return _fetch_config(base_url, namespace_id, data_id, group_name, timeout)
 
     try:
-        with urllib.request.urlopen(url) as response:
-            response_text = response.read().decode('utf-8')
+        result = _fetch_config(base_url, namespace_id, data_id, group_name, timeout)
+        if result['success']:
+            # Errors are never cached; they should retry on the next call
+            _CACHE.set(cache_key, result)
+        event.result = result
+        return result
+    finally:
+        with _INFLIGHT_LOCK:
+            _INFLIGHT.pop(cache_key, None)
+        event.set()
 
-            # Try to parse as JSON first (v3 API returns JSON)
-            try:
-                response_data = json.loads(response_text)
-
-                # Extract content from nested structure
-                if isinstance(response_data, dict):
-                    # Handle v3 API response format
-                    if 'data' in response_data and isinstance(response_data['data'], dict):
-                        content = response_data['data'].get('content', response_text)
-                    else:
-                        content = response_data.get('content', response_text)
-                else:
-                    content = response_text
-            except json.JSONDecodeError:
-                # If not JSON, treat as raw content
-                content = response_text
+
+def _fetch_config(
+    base_url: str,
+    namespace_id: str,
+    data_id: str,
+    group_name: str = "DEFAULT_GROUP",
+    timeout: float = 10.0
+) -> dict:
+    """Perform the actual HTTP fetch (no caching or deduplication)."""
+    # Fixed three-param schema: quote each field into an f-string instead
+    # of building a dict for urlencode on every call
+    url = (
+        f"{base_url}/nacos/v3/admin/cs/config"
+        f"?namespaceId={quote(namespace_id, safe='')}"
+        f"&groupName={quote(group_name, safe='')}"
+        f"&dataId={quote(data_id, safe='')}"
+    )
+
+    for attempt in range(_MAX_RETRIES + 1):
+        try:
+            if _SESSION is not None:
+                # requests decompresses transparently; just ask for gzip
+                resp = _SESSION.get(url, headers={'Accept-Encoding': 'gzip'},
+                                    timeout=timeout)
+                resp.raise_for_status()
+                raw = resp.content
+            else:
+                req = urllib.request.Request(url, headers={'Accept-Encoding': 'gzip'})
+                with urllib.request.urlopen(req, timeout=timeout) as response:
+                    raw = response.read()
+                    if response.headers.get('Content-Encoding') == 'gzip':
+                        raw = gzip.decompress(raw)
+
+            # Sniff the first byte before attempting a JSON parse: plain
+            # YAML/properties bodies skip the raised-and-caught decode
+            # error entirely. The parser takes the bytes directly, so the
+            # body is only decoded to str in the raw-content fallback.
+            if raw.lstrip()[:1] in (b'{', b'['):
+                try:
+                    response_data = _loads(raw)
+
+                    # v3 always wraps as {"data": {"content": ...}}, so take
+                    # that shape in one exception-free access and fall back
+                    # through the rarer layouts on KeyError/TypeError
+                    try:
+                        content = response_data['data']['content']
+                    except (KeyError, TypeError):
+                        try:
+                            content = response_data['content']
+                        except (KeyError, TypeError):
+                            content = None
+                    if content is None:
+                        content = raw.decode('utf-8')
+                except ValueError:
+                    # Looked like JSON but was not; treat as raw content
+                    content = raw.decode('utf-8')
+            else:
+                content = raw.decode('utf-8')
 
             return {
                 'success': True,
@@ -64,38 +216,126 @@ def get_config(
                 'namespaceId': namespace_id,
                 'content': content
             }
-    except urllib.error.HTTPError as e:
-        error_detail = e.read().decode() if e.fp else ''
-        return {
-            'success': False,
-            'error': f'HTTP Error {e.code}: {e.reason}',
-            'details': error_detail,
-            'dataId': data_id,
-            'group': group_name
-        }
-    except urllib.error.URLError as e:
-        return {
-            'success': False,
-            'error': f'Connection Error: {e.reason}',
-            'dataId': data_id,
-            'group': group_name
-        }
-    except Exception as e:
-        return {
-            'success': False,
-            'error': f'Unexpected error: {str(e)}',
-            'dataId': data_id,
-            'group': group_name
-        }
+        except urllib.error.HTTPError as e:
+            if e.code in _RETRYABLE_STATUS and attempt < _MAX_RETRIES:
+                time.sleep(_retry_delay(attempt, e.headers.get('Retry-After')))
+                continue
+            # Read the error body once, defensively: it may already be
+            # consumed, gzip-compressed, or not valid UTF-8
+            try:
+                error_body = e.read()
+                if e.headers.get('Content-Encoding') == 'gzip':
+                    error_body = gzip.decompress(error_body)
+            except Exception:
+                error_body = b''
+            error_detail = error_body.decode('utf-8', errors='replace')
+            try:
+                # Surface the server's structured message when there is one
+                message = _loads(error_body).get('message')
+                if message:
+                    error_detail = message
+            except (ValueError, AttributeError):
+                pass
+            return {
+                'success': False,
+                'error': f'HTTP Error {e.code}: {e.reason}',
+                'error_code': 'http',
+                'status': e.code,
+                'details': error_detail,
+                'dataId': data_id,
+                'group': group_name
+            }
+        except urllib.error.URLError as e:
+            if attempt < _MAX_RETRIES:
+                time.sleep(_retry_delay(attempt))
+                continue
+            return {
+                'success': False,
+                'error': f'Connection Error: {e.reason}',
+                'error_code': 'connection',
+                'dataId': data_id,
+                'group': group_name
+            }
+        except (TimeoutError, ssl.SSLError, ConnectionResetError) as e:
+            # urllib wraps most socket errors in URLError, but a failure
+            # mid-read of the body surfaces the raw exception
+            if attempt < _MAX_RETRIES:
+                time.sleep(_retry_delay(attempt))
+                continue
+            return {
+                'success': False,
+                'error': f'Connection Error: {e}',
+                'error_code': 'timeout' if isinstance(e, TimeoutError) else 'connection',
+                'dataId': data_id,
+                'group': group_name
+            }
+        except Exception as e:
+            # requests' exceptions can only be named when the import
+            # succeeded, so they are narrowed here instead of in the chain;
+            # anything genuinely unexpected propagates with its traceback
+            if requests is not None and isinstance(e, requests.HTTPError):
+                resp = e.response
+                if resp.status_code in _RETRYABLE_STATUS and attempt < _MAX_RETRIES:
+                    time.sleep(_retry_delay(attempt, resp.headers.get('Retry-After')))
+                    continue
+                return {
+                    'success': False,
+                    'error': f'HTTP Error {resp.status_code}: {resp.reason}',
+                    'error_code': 'http',
+                    'status': resp.status_code,
+                    'details': resp.text,
+                    'dataId': data_id,
+                    'group': group_name
+                }
+            if requests is not None and isinstance(e, (requests.ConnectionError, requests.Timeout)):
+                if attempt < _MAX_RETRIES:
+                    time.sleep(_retry_delay(attempt))
+                    continue
+                return {
+                    'success': False,
+                    'error': f'Connection Error: {e}',
+                    'error_code': 'timeout' if isinstance(e, requests.Timeout) else 'connection',
+                    'dataId': data_id,
+                    'group': group_name
+                }
+            raise
+
+
+def get_config_many(
+    base_url: str,
+    namespace_id: str,
+    data_ids: List[str],
+    group_name: str = "DEFAULT_GROUP",
+    timeout: float = 10.0
+) -> List[dict]:
+    """
+    Fetch several configuration files concurrently.
+
+    The work is pure I/O-bound HTTP, so one thread per in-flight request
+    collapses K round-trips into roughly one. Results are returned in the
+    order of data_ids; per-config errors stay in their result dicts.
+    """
+    if len(data_ids) == 1:
+        return [get_config(base_url, namespace_id, data_ids[0], group_name, timeout)]
+
+    with ThreadPoolExecutor(max_workers=min(8, len(data_ids))) as executor:
+        return list(executor.map(
+            lambda data_id: get_config(base_url, namespace_id, data_id, group_name, timeout),
+            data_ids,
+        ))
 
 
 def main():
+    # CLI-only dependency; importing this module as a library skips it
+    import argparse
+
     parser = argparse.ArgumentParser(
         description='Get a specific configuration file from Nacos'
     )
     parser.add_argument(
         'data_id',
-        help='Configuration data ID (e.g., application-local.yml)'
+        nargs='+',
+        help='Configuration data ID(s) (e.g., application-local.yml)'
     )
     parser.add_argument(
         '--base-url',
@@ -118,26 +358,66 @@ def main():
         default='content',
         help='Output format: content (raw config) or json (metadata+content) (default: content)'
     )
+    parser.add_argument(
+        '--timeout',
+        type=float,
+        default=10.0,
+        help='Socket timeout in seconds per request (default: 10)'
+    )
+    parser.add_argument(
+        '--cache-ttl',
+        type=float,
+        default=300.0,
+        help='Seconds a fetched config stays cached in this process (default: 300)'
+    )
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Always fetch from the server, bypassing the in-memory cache'
+    )
 
     args = parser.parse_args()
 
-    result = get_config(
+    global _CACHE_ENABLED
+    _CACHE_ENABLED = not args.no_cache
+    _CACHE.ttl = args.cache_ttl
+
+    results = get_config_many(
         args.base_url,
         args.namespace_id,
         args.data_id,
-        args.group
+        args.group,
+        args.timeout
     )
 
     if args.format == 'json':
-        print(json.dumps(result, indent=2, ensure_ascii=False))
-    else:
-        if result['success']:
-            print(result['content'])
+        # Single ID keeps the original object shape; several become a list
+        payload = results[0] if len(results) == 1 else results
+        # orjson emits UTF-8 bytes directly (matching ensure_ascii=False)
+        # and encodes large config payloads far faster than stdlib json
+        if orjson is not None:
+            sys.stdout.buffer.write(orjson.dumps(payload, option=orjson.OPT_INDENT_2))
+            sys.stdout.buffer.write(b'\n')
         else:
-            print(f"Error retrieving config '{args.data_id}' from group '{args.group}':", file=sys.stderr)
-            print(f"  {result['error']}", file=sys.stderr)
-            if result.get('details'):
-                print(f"  Details: {result['details']}", file=sys.stderr)
+            print(json.dumps(payload, indent=2, ensure_ascii=False))
+    else:
+        failed = False
+        multiple = len(results) > 1
+        for data_id, result in zip(args.data_id, results):
+            if result['success']:
+                if multiple:
+                    sys.stdout.buffer.write(f"# === {data_id} ===\n".encode('utf-8'))
+                # Large configs: one encode straight into the binary buffer,
+                # skipping text-mode stdout's per-line processing
+                sys.stdout.buffer.write(result['content'].encode('utf-8'))
+                sys.stdout.buffer.write(b'\n')
+            else:
+                failed = True
+                print(f"Error retrieving config '{data_id}' from group '{args.group}':", file=sys.stderr)
+                print(f"  {result['error']}", file=sys.stderr)
+                if result.get('details'):
+                    print(f"  Details: {result['details']}", file=sys.stderr)
+        if failed:
             sys.exit(1)
 
 
@@ -3,12 +3,75 @@
 List all configuration files in a Nacos namespace.
 """
 import argparse
+import gzip
 import json
 import sys
 import urllib.request
 import urllib.error
 from typing import Optional
 
+try:
+    import ijson
+except ImportError:  # optional; the buffered stdlib parse is the fallback
+    ijson = None
+
+try:
+    import requests
+except ImportError:  # optional; urllib works everywhere
+    requests = None
+
+# One session per process: connections are kept alive across calls and
+# responses arrive gzip-compressed
+_SESSION = requests.Session() if requests is not None else None
+
+
+class _TeeReader:
+    """File-like wrapper recording what the incremental parser consumes,
+    so an unexpected response shape can be reparsed without re-fetching."""
+
+    def __init__(self, fp):
+        self._fp = fp
+        self.buffer = bytearray()
+
+    def read(self, n=-1):
+        chunk = self._fp.read(n)
+        self.buffer.extend(chunk)
+        return chunk
+
+
+def _unwrap_configs(response_data) -> list:
+    """Extract the config list from the (possibly nested) response."""
+    if isinstance(response_data, dict) and 'data' in response_data:
+        configs = response_data['data']
+    else:
+        configs = response_data
+
+    # Handle case where configs is still a dict with nested data
+    if isinstance(configs, dict) and 'data' in configs:
+        configs = configs['data']
+
+    return configs if isinstance(configs, list) else []
+
+
+def _read_configs(response) -> list:
+    """Parse the config list out of an open HTTP response.
+
+    With ijson installed the items are decoded incrementally off the
+    socket (memory stays at one config at a time); otherwise, or when the
+    response does not have the expected v3 nesting, the whole body is
+    parsed the old way.
+    """
+    if ijson is None:
+        return _unwrap_configs(json.loads(response.read().decode()))
+
+    tee = _TeeReader(response)
+    configs = list(ijson.items(tee, 'data.data.item'))
+    if configs:
+        return configs
+    # Empty or differently nested: reparse the consumed bytes plus the rest
+    raw = bytes(tee.buffer) + response.read()
+    return _unwrap_configs(json.loads(raw.decode()))
+
 
 def list_configs(
     base_url: str,
@@ -29,37 +92,36 @@ def list_configs(
     url = f"{base_url}/nacos/v3/admin/cs/history/configs?namespaceId={namespace_id}"
 
     try:
-        with urllib.request.urlopen(url) as response:
-            response_data = json.loads(response.read().decode())
-
-            # Extract the actual config list from nested response
-            if isinstance(response_data, dict) and 'data' in response_data:
-                configs = response_data['data']
-            else:
-                configs = response_data
-
-            # Handle case where configs is still a dict with nested data
-            if isinstance(configs, dict) and 'data' in configs:
-                configs = configs['data']
-
-            # Ensure configs is a list
-            if not isinstance(configs, list):
-                configs = []
-
-            # Filter if search term provided
-            if search:
-                configs = [
-                    config for config in configs
-                    if search.lower() in config.get('dataId', '').lower()
-                    or search.lower() in config.get('groupName', '').lower()
-                    or search.lower() in config.get('group', '').lower()
-                ]
+        if _SESSION is not None:
+            r = _SESSION.get(url, headers={'Accept-Encoding': 'gzip'},
+                             timeout=10, stream=True)
+            r.raise_for_status()
+            r.raw.decode_content = True  # transparent gunzip for the parser
+            configs = _read_configs(r.raw)
+        else:
+            req = urllib.request.Request(url, headers={'Accept-Encoding': 'gzip'})
+            with urllib.request.urlopen(req) as response:
+                if response.headers.get('Content-Encoding') == 'gzip':
+                    configs = _read_configs(gzip.GzipFile(fileobj=response))
+                else:
+                    configs = _read_configs(response)
+
+        # Filter if search term provided (lowercase the term once, not
+        # three times per config)
+        if search:
+            s = search.lower()
+            configs = [
+                config for config in configs
+                if s in config.get('dataId', '').lower()
+                or s in config.get('groupName', '').lower()
+                or s in config.get('group', '').lower()
+            ]
 
-            return {
-                'success': True,
-                'data': configs,
-                'count': len(configs)
-            }
+        return {
+            'success': True,
+            'data': configs,
+            'count': len(configs)
+        }
     except urllib.error.HTTPError as e:
         return {
             'success': False,
@@ -72,6 +134,18 @@ def list_configs(
             'error': f'Connection Error: {e.reason}'
         }
     except Exception as e:
+        if requests is not None and isinstance(e, requests.HTTPError):
+            resp = e.response
+            return {
+                'success': False,
+                'error': f'HTTP Error {resp.status_code}: {resp.reason}',
+                'details': resp.text
+            }
+        if requests is not None and isinstance(e, requests.ConnectionError):
+            return {
+                'success': False,
+                'error': f'Connection Error: {e}'
+            }
         return {
             'success': False,
             'error': f'Unexpected error: {str(e)}'
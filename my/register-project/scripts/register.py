@@ -2,6 +2,7 @@
 """Register current project into ~/.claude/CLAUDE.md under ## Projects section."""
 
 import argparse
+import mmap
 import os
 import subprocess
 import sys
@@ -27,10 +28,11 @@ def get_project_name(path: str) -> str:
 
 
 def read_claude_md() -> str:
-    if not os.path.exists(CLAUDE_MD):
+    try:
+        with open(CLAUDE_MD, "r", encoding="utf-8") as f:
+            return f.read()
+    except FileNotFoundError:
         return ""
-    with open(CLAUDE_MD, "r", encoding="utf-8") as f:
-        return f.read()
 
 
 def write_claude_md(content: str) -> None:
@@ -45,50 +47,125 @@ def format_entry(name: str, path: str, desc: str) -> str:
         return f"- **{name}** (`{path}`)"
 
 
-def register(path: str, name: str, desc: str) -> None:
+def _find_projects_span(mm) -> "tuple[int, int] | None":
+    """Locate the body of the Projects section: (start, end) byte offsets."""
+    header_line = (PROJECTS_HEADER + "\n").encode("utf-8")
+    if mm[:len(header_line)] == header_line:
+        start = len(header_line)
+    else:
+        i = mm.find(b"\n" + header_line)
+        if i == -1:
+            return None
+        start = i + 1 + len(header_line)
+    nxt = mm.find(b"\n## ", start)
+    end = len(mm) if nxt == -1 else nxt + 1
+    return start, end
+
+
+def _register_fast(path: str, name: str, new_entry: str) -> "str | None":
+    """Handle the common cases without rewriting the whole file.
+
+    New file / missing section / new entry at the end become plain appends;
+    a same-length update is patched in place through mmap. Returns a status
+    message when handled, or None to fall back to the full rebuild.
+    """
+    entry_bytes = new_entry.encode("utf-8")
+    section_bytes = (PROJECTS_HEADER + "\n\n" + new_entry + "\n").encode("utf-8")
+
+    try:
+        f = open(CLAUDE_MD, "r+b")
+    except FileNotFoundError:
+        with open(CLAUDE_MD, "wb") as fh:
+            fh.write(section_bytes)
+        return f"Created '{PROJECTS_HEADER}' section and added entry."
+
+    with f:
+        f.seek(0, 2)
+        if f.tell() == 0:
+            f.write(section_bytes)
+            return f"Created '{PROJECTS_HEADER}' section and added entry."
+
+        with mmap.mmap(f.fileno(), 0) as mm:
+            span = _find_projects_span(mm)
+            if span is None:
+                # Only append a fresh section when the header is absent
+                # outright; a header the strict match missed (e.g. trailing
+                # whitespace) must go through the tolerant rebuild, not get
+                # a duplicate section appended after it
+                if mm.find(PROJECTS_HEADER.encode("utf-8")) != -1:
+                    return None
+                sep = b"\n" if mm[-1:] == b"\n" else b"\n\n"
+                f.write(sep + section_bytes)
+                return f"Created '{PROJECTS_HEADER}' section and added entry."
+
+            start, end = span
+            hit = mm.find(f"`{path}`".encode("utf-8"), start, end)
+            if hit != -1:
+                line_start = mm.rfind(b"\n", start, hit) + 1
+                line_end = mm.find(b"\n", hit, end)
+                if line_end == -1:
+                    line_end = end
+                if line_end - line_start != len(entry_bytes):
+                    return None  # length changed: rebuild the file
+                mm[line_start:line_end] = entry_bytes
+                mm.flush()
+                return f"Updated existing entry for '{path}'."
+
+            # New entry: append only when Projects is the last section and
+            # there is no trailing blank line to insert before
+            if end == len(mm) and mm[-1:] == b"\n" and mm[-2:] != b"\n\n":
+                f.write(entry_bytes + b"\n")
+                return f"Added new entry for '{name}'."
+
+    return None
+
+
+def _register_rebuild(path: str, name: str, new_entry: str) -> str:
+    """Full read/patch/rewrite path for layouts the fast path can't handle."""
     content = read_claude_md()
+    lines = content.splitlines(keepends=True)
+    in_section = False
+    section_start = None
+    next_section = None
+    existing_entry_line = None
+
+    for i, line in enumerate(lines):
+        if line.strip() == PROJECTS_HEADER:
+            in_section = True
+            section_start = i
+            continue
+        if in_section:
+            if line.startswith("## ") and i != section_start:
+                next_section = i
+                break
+            # Check if this path is already registered
+            if f"`{path}`" in line:
+                existing_entry_line = i
+
+    if existing_entry_line is not None:
+        lines[existing_entry_line] = new_entry + "\n"
+        status = f"Updated existing entry for '{path}'."
+    else:
+        # Insert before next section or at end
+        insert_at = next_section if next_section is not None else len(lines)
+        # Ensure blank line before next section
+        while insert_at > 0 and lines[insert_at - 1].strip() == "":
+            insert_at -= 1
+        lines.insert(insert_at, new_entry + "\n")
+        status = f"Added new entry for '{name}'."
+
+    write_claude_md("".join(lines))
+    return status
+
+
+def register(path: str, name: str, desc: str) -> None:
     new_entry = format_entry(name, path, desc)
 
-    if PROJECTS_HEADER not in content:
-        # Append the section
-        sep = "\n" if content.endswith("\n") else "\n\n"
-        content = content + sep + PROJECTS_HEADER + "\n\n" + new_entry + "\n"
-        print(f"Created '{PROJECTS_HEADER}' section and added entry.")
-    else:
-        lines = content.splitlines(keepends=True)
-        in_section = False
-        section_start = None
-        next_section = None
-        existing_entry_line = None
-
-        for i, line in enumerate(lines):
-            if line.strip() == PROJECTS_HEADER:
-                in_section = True
-                section_start = i
-                continue
-            if in_section:
-                if line.startswith("## ") and i != section_start:
-                    next_section = i
-                    break
-                # Check if this path is already registered
-                if f"`{path}`" in line:
-                    existing_entry_line = i
-
-        if existing_entry_line is not None:
-            lines[existing_entry_line] = new_entry + "\n"
-            content = "".join(lines)
-            print(f"Updated existing entry for '{path}'.")
-        else:
-            # Insert before next section or at end
-            insert_at = next_section if next_section is not None else len(lines)
-            # Ensure blank line before next section
-            while insert_at > 0 and lines[insert_at - 1].strip() == "":
-                insert_at -= 1
-            lines.insert(insert_at, new_entry + "\n")
-            content = "".join(lines)
-            print(f"Added new entry for '{name}'.")
-
-    write_claude_md(content)
+    status = _register_fast(path, name, new_entry)
+    if status is None:
+        status = _register_rebuild(path, name, new_entry)
+
+    print(status)
     print(f"\nEntry: {new_entry}")
     print(f"Written to: {CLAUDE_MD}")
 
@@ -8,31 +8,73 @@ Collect Claude Code session context for analysis:
 """
 
 import json
+import os
 import sys
 from pathlib import Path
 from collections import defaultdict
 
+try:
+    import orjson
+except ImportError:  # optional speedup; stdlib json is the fallback
+    orjson = None
+
+try:
+    import pandas as pd
+except ImportError:  # optional; the pure-Python fallback works everywhere
+    pd = None
+
 LOG_FILE = Path.home() / ".claude" / "tool_calls.log"
 SKILLS_DIR = Path.home() / ".claude" / "skills"
 CLAUDE_MD = Path.home() / ".claude" / "CLAUDE.md"
 
 
 def load_logs(limit=500):
+    """Parse only the tail of the log.
+
+    Seeks a bounded window back from the end and grows it until it covers
+    `limit` lines, so I/O and parsing track the tail size instead of the
+    whole file.
+    """
     if not LOG_FILE.exists():
         return []
+    loads = orjson.loads if orjson is not None else json.loads
+    with open(LOG_FILE, "rb") as f:
+        f.seek(0, 2)
+        size = f.tell()
+        window = min(size, 256 * 1024)
+        while True:
+            f.seek(size - window)
+            buf = f.read()
+            if window >= size or buf.count(b"\n") > limit:
+                break
+            window = min(size, window * 2)
+        if window < size:
+            # Discard the leading partial line
+            buf = buf.split(b"\n", 1)[1] if b"\n" in buf else b""
     logs = []
-    with open(LOG_FILE) as f:
-        for line in f:
-            line = line.strip()
-            if line:
-                try:
-                    logs.append(json.loads(line))
-                except json.JSONDecodeError:
-                    continue
+    for line in buf.split(b"\n"):
+        if line.strip():
+            try:
+                logs.append(loads(line))
+            except ValueError:
+                continue
     return logs[-limit:]
 
 
 def analyze_tools(logs):
+    if pd is not None and logs:
+        # Vectorized group-by: the reduction runs in C instead of a dict loop
+        df = pd.DataFrame(logs, columns=["tool_name", "duration_ms"])
+        df["tool_name"] = df["tool_name"].fillna("unknown")
+        df["duration_ms"] = df["duration_ms"].fillna(0)
+        agg = df.groupby("tool_name", sort=False)["duration_ms"].agg(count="count", total="sum")
+        agg["avg_ms"] = (agg["total"] / agg["count"]).round()
+        agg = agg.sort_values("count", ascending=False)
+        return [
+            {"tool": tool, "count": int(count), "avg_ms": int(avg)}
+            for tool, count, avg in zip(agg.index, agg["count"], agg["avg_ms"])
+        ]
+
     stats = defaultdict(lambda: {"count": 0, "total_ms": 0})
     for log in logs:
         t = log.get("tool_name", "unknown")
@@ -56,21 +98,44 @@ def extract_bash_commands(logs, top_n=30):
     return commands[:top_n]
 
 
+def read_skill_description(skill_md):
+    """Pull the frontmatter description out of the first 4 KiB of SKILL.md."""
+    try:
+        with open(skill_md, "rb") as f:
+            head = f.read(4096)
+    except OSError:
+        return ""
+    if head.startswith(b"description:"):
+        i = 0
+    else:
+        i = head.find(b"\ndescription:")
+        if i == -1:
+            return ""
+        i += 1
+    j = head.find(b"\n", i)
+    if j == -1:
+        j = len(head)
+    return head[i + len(b"description:"):j].decode("utf-8", "replace").strip().strip('"')
+
+
 def list_skills():
-    if not SKILLS_DIR.exists():
+    # scandir exposes cached DirEntry types: one syscall per entry, and the
+    # FileNotFoundError branch replaces the separate exists() check
+    try:
+        with os.scandir(SKILLS_DIR) as it:
+            dirs = sorted(
+                (e for e in it if e.is_dir(follow_symlinks=False)),
+                key=lambda e: e.name,
+            )
+    except FileNotFoundError:
         return []
-    skills = []
-    for d in sorted(SKILLS_DIR.iterdir()):
-        if d.is_dir():
-            skill_md = d / "SKILL.md"
-            desc = ""
-            if skill_md.exists():
-                for line in skill_md.read_text().splitlines():
-                    if line.startswith("description:"):
-                        desc = line.replace("description:", "").strip().strip('"')
-                        break
-            skills.append({"name": d.name, "description": desc[:120]})
-    return skills
+    return [
+        {
+            "name": e.name,
+            "description": read_skill_description(os.path.join(e.path, "SKILL.md"))[:120],
+        }
+        for e in dirs
+    ]
 
 
 def read_claude_md():
@@ -88,7 +153,11 @@ def main():
         "installed_skills": list_skills(),
         "claude_md": read_claude_md(),
     }
-    print(json.dumps(data, ensure_ascii=False, indent=2))
+    if orjson is not None:
+        sys.stdout.buffer.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+        sys.stdout.buffer.write(b"\n")
+    else:
+        print(json.dumps(data, ensure_ascii=False, indent=2))
 
 
 if __name__ == "__main__":
@@ -1,409 +1,746 @@
-#!/usr/bin/env python3
-"""
-Claude Code session viewer - query sessions from multiple dimensions.
-
-Usage:
-  sessions.py list [--date YYYY-MM-DD] [--project NAME]
-  sessions.py today
-  sessions.py show SESSION_ID [--limit N]
-  sessions.py search KEYWORD [--date YYYY-MM-DD]
-  sessions.py projects
-  sessions.py tokens SESSION_ID
-  sessions.py cost [--date YYYY-MM-DD] [--project NAME]
-"""
-
-# Sonnet 4.x pricing (USD per 1M tokens) — update if pricing changes
-PRICE = {
-    "input":          3.00,
-    "output":        15.00,
-    "cache_write":    3.75,
-    "cache_read":     0.30,
-}
-
-import json
-import sys
-import argparse
-from pathlib import Path
-from datetime import datetime, timezone
-
-PROJECTS_DIR = Path.home() / ".claude" / "projects"
-
-
-def parse_sessions(project_dir: Path) -> list[dict]:
-    """Parse all session files in a project directory."""
-    sessions = []
-    for f in project_dir.glob("*.jsonl"):
-        session_id = f.stem
-        entries = []
-        try:
-            with open(f, encoding="utf-8") as fh:
-                for line in fh:
-                    line = line.strip()
-                    if line:
-                        try:
-                            entries.append(json.loads(line))
-                        except json.JSONDecodeError:
-                            pass
-        except Exception:
-            continue
-
-        messages = [e for e in entries if e.get("type") in ("user", "assistant")]
-        if not messages:
-            continue
-
-        first = messages[0]
-        last = messages[-1]
-
-        first_user = next(
-            (e for e in messages if e.get("type") == "user"),
-            None,
-        )
-        first_user_text = ""
-        if first_user:
-            content = first_user.get("message", {}).get("content", "")
-            if isinstance(content, list):
-                for c in content:
-                    if isinstance(c, dict) and c.get("type") == "text":
-                        first_user_text = c["text"]
-                        break
-            elif isinstance(content, str):
-                first_user_text = content
-
-        sessions.append({
-            "session_id": session_id,
-            "project": project_dir.name,
-            "cwd": first.get("cwd", ""),
-            "git_branch": first.get("gitBranch", ""),
-            "start_time": first.get("timestamp", ""),
-            "end_time": last.get("timestamp", ""),
-            "message_count": len(messages),
-            "first_user_msg": first_user_text[:120].replace("\n", " "),
-            "file": f,
-            "entries": entries,
-        })
-    return sessions
-
-
-def load_all_sessions() -> list[dict]:
-    sessions = []
-    if not PROJECTS_DIR.exists():
-        return sessions
-    for project_dir in PROJECTS_DIR.iterdir():
-        if project_dir.is_dir():
-            sessions.extend(parse_sessions(project_dir))
-    sessions.sort(key=lambda s: s["start_time"], reverse=True)
-    return sessions
-
-
-def format_time(iso: str) -> str:
-    if not iso:
-        return "-"
-    try:
-        dt = datetime.fromisoformat(iso.replace("Z", "+00:00")).astimezone()
-        return dt.strftime("%m-%d %H:%M")
-    except Exception:
-        return iso[:16]
-
-
-def filter_by_date(sessions: list[dict], date_str: str) -> list[dict]:
-    try:
-        target = datetime.strptime(date_str, "%Y-%m-%d").date()
-    except ValueError:
-        print(f"Invalid date format: {date_str}. Use YYYY-MM-DD.")
-        sys.exit(1)
-    result = []
-    for s in sessions:
-        if not s["start_time"]:
-            continue
-        try:
-            dt = datetime.fromisoformat(s["start_time"].replace("Z", "+00:00")).astimezone()
-            if dt.date() == target:
-                result.append(s)
-        except Exception:
-            pass
-    return result
-
-
-def filter_by_project(sessions: list[dict], project: str) -> list[dict]:
-    return [s for s in sessions if project.lower() in s["project"].lower()]
-
-
-def cmd_list(args):
-    sessions = load_all_sessions()
-    if args.date:
-        sessions = filter_by_date(sessions, args.date)
-    if args.project:
-        sessions = filter_by_project(sessions, args.project)
-
-    if not sessions:
-        print("No sessions found.")
-        return
-
-    print(f"{'Time':<12} {'Session ID':<10} {'Branch':<16} {'Msgs':>4}  {'First message'}")
-    print("-" * 90)
-    for s in sessions:
-        sid = s["session_id"][:8]
-        branch = (s["git_branch"] or "-")[:15]
-        msg = s["first_user_msg"][:50]
-        print(f"{format_time(s['start_time']):<12} {sid:<10} {branch:<16} {s['message_count']:>4}  {msg}")
-        # Show project as sub-line if no filter
-        if not args.project:
-            print(f"{'':12} project: {s['project']}")
-
-
-def cmd_today(args):
-    today = datetime.now().strftime("%Y-%m-%d")
-    args.date = today
-    args.project = None
-    cmd_list(args)
-
-
-def cmd_show(args):
-    sessions = load_all_sessions()
-    matches = [s for s in sessions if s["session_id"].startswith(args.session_id)]
-    if not matches:
-        print(f"Session not found: {args.session_id}")
-        sys.exit(1)
-
-    s = matches[0]
-    print(f"Session : {s['session_id']}")
-    print(f"Project : {s['project']}")
-    print(f"Branch  : {s['git_branch'] or '-'}")
-    print(f"Time    : {format_time(s['start_time'])} → {format_time(s['end_time'])}")
-    print(f"Messages: {s['message_count']}")
-    print("=" * 80)
-
-    messages = [e for e in s["entries"] if e.get("type") in ("user", "assistant")]
-    limit = args.limit if args.limit else len(messages)
-    for e in messages[:limit]:
-        role = e.get("type", "?").upper()
-        content = e.get("message", {}).get("content", "")
-        if isinstance(content, list):
-            parts = []
-            for c in content:
-                if isinstance(c, dict):
-                    if c.get("type") == "text":
-                        parts.append(c["text"])
-                    elif c.get("type") == "tool_use":
-                        parts.append(f"[tool: {c.get('name')}]")
-            text = " ".join(parts)
-        else:
-            text = content or ""
-
-        text = text.strip().replace("\n", " ")[:300]
-        ts = format_time(e.get("timestamp", ""))
-        print(f"[{ts}] {role}: {text}")
-
-
-def cmd_search(args):
-    keyword = args.keyword.lower()
-    sessions = load_all_sessions()
-    if args.date:
-        sessions = filter_by_date(sessions, args.date)
-
-    found = 0
-    for s in sessions:
-        hits = []
-        messages = [e for e in s["entries"] if e.get("type") in ("user", "assistant")]
-        for e in messages:
-            content = e.get("message", {}).get("content", "")
-            if isinstance(content, list):
-                text = " ".join(
-                    c.get("text", "") for c in content
-                    if isinstance(c, dict) and c.get("type") == "text"
-                )
-            else:
-                text = content or ""
-            if keyword in text.lower():
-                snippet = text.strip().replace("\n", " ")
-                idx = snippet.lower().find(keyword)
-                start = max(0, idx - 40)
-                hits.append(f"  ...{snippet[start:start+120]}...")
-
-        if hits:
-            found += 1
-            print(f"\n[{format_time(s['start_time'])}] {s['session_id'][:8]} | {s['project']}")
-            print(f"  {s['first_user_msg'][:80]}")
-            for h in hits[:3]:
-                print(h)
-
-    if found == 0:
-        print(f"No sessions found containing: {args.keyword}")
-    else:
-        print(f"\n--- Found in {found} session(s) ---")
-
-
-def extract_usage(entries: list[dict]) -> dict:
-    """Sum token usage across all assistant turns in a session."""
-    u = {"input": 0, "output": 0, "cache_write": 0, "cache_read": 0, "turns": 0}
-    for e in entries:
-        if e.get("type") != "assistant":
-            continue
-        usage = e.get("message", {}).get("usage")
-        if not usage:
-            continue
-        u["input"]       += usage.get("input_tokens", 0)
-        u["output"]      += usage.get("output_tokens", 0)
-        u["cache_write"] += usage.get("cache_creation_input_tokens", 0)
-        u["cache_read"]  += usage.get("cache_read_input_tokens", 0)
-        u["turns"]       += 1
-    return u
-
-
-def calc_cost(u: dict) -> float:
-    return (
-        u["input"]       / 1_000_000 * PRICE["input"] +
-        u["output"]      / 1_000_000 * PRICE["output"] +
-        u["cache_write"] / 1_000_000 * PRICE["cache_write"] +
-        u["cache_read"]  / 1_000_000 * PRICE["cache_read"]
-    )
-
-
-def fmt_tok(n: int) -> str:
-    if n >= 1_000_000:
-        return f"{n/1_000_000:.2f}M"
-    if n >= 1_000:
-        return f"{n/1_000:.1f}K"
-    return str(n)
-
-
-def cache_hit_rate(u: dict) -> str:
-    total_in = u["input"] + u["cache_write"] + u["cache_read"]
-    if total_in == 0:
-        return "N/A"
-    return f"{u['cache_read'] / total_in * 100:.1f}%"
-
-
-def cmd_tokens(args):
-    sessions = load_all_sessions()
-    matches = [s for s in sessions if s["session_id"].startswith(args.session_id)]
-    if not matches:
-        print(f"Session not found: {args.session_id}")
-        sys.exit(1)
-
-    s = matches[0]
-    u = extract_usage(s["entries"])
-    cost = calc_cost(u)
-    total_in = u["input"] + u["cache_write"] + u["cache_read"]
-
-    print(f"Session : {s['session_id']}")
-    print(f"Project : {s['project']}")
-    print(f"Time    : {format_time(s['start_time'])} → {format_time(s['end_time'])}")
-    print(f"Turns   : {u['turns']}")
-    print()
-    print(f"{'Token breakdown':}")
-    print(f"  Input (non-cached) : {fmt_tok(u['input']):>10}   ${u['input']/1e6*PRICE['input']:.4f}")
-    print(f"  Cache write        : {fmt_tok(u['cache_write']):>10}   ${u['cache_write']/1e6*PRICE['cache_write']:.4f}")
-    print(f"  Cache read         : {fmt_tok(u['cache_read']):>10}   ${u['cache_read']/1e6*PRICE['cache_read']:.4f}")
-    print(f"  Output             : {fmt_tok(u['output']):>10}   ${u['output']/1e6*PRICE['output']:.4f}")
-    print(f"  {'─'*40}")
-    print(f"  Total input        : {fmt_tok(total_in):>10}")
-    print(f"  Cache hit rate     : {cache_hit_rate(u):>10}")
-    print(f"  Estimated cost     : {'$' + f'{cost:.4f}':>10}")
-
-
-def cmd_cost(args):
-    sessions = load_all_sessions()
-    if args.date:
-        sessions = filter_by_date(sessions, args.date)
-    if args.project:
-        sessions = filter_by_project(sessions, args.project)
-
-    if not sessions:
-        print("No sessions found.")
-        return
-
-    print(f"{'Time':<12} {'Session':<10} {'Turns':>5} {'CacheHit':>9} {'Input':>8} {'CacheW':>8} {'CacheR':>8} {'Output':>8} {'Cost':>8}")
-    print("-" * 100)
-
-    grand = {"input": 0, "output": 0, "cache_write": 0, "cache_read": 0, "turns": 0}
-    for s in sessions:
-        u = extract_usage(s["entries"])
-        cost = calc_cost(u)
-        for k in grand:
-            grand[k] += u[k]
-        print(
-            f"{format_time(s['start_time']):<12} "
-            f"{s['session_id'][:8]:<10} "
-            f"{u['turns']:>5} "
-            f"{cache_hit_rate(u):>9} "
-            f"{fmt_tok(u['input']):>8} "
-            f"{fmt_tok(u['cache_write']):>8} "
-            f"{fmt_tok(u['cache_read']):>8} "
-            f"{fmt_tok(u['output']):>8} "
-            f"${cost:.4f}"
-        )
-
-    if len(sessions) > 1:
-        grand_cost = calc_cost(grand)
-        print("-" * 100)
-        print(
-            f"{'TOTAL':<12} "
-            f"{len(sessions)} sessions"
-            f"{grand['turns']:>14} "
-            f"{cache_hit_rate(grand):>9} "
-            f"{fmt_tok(grand['input']):>8} "
-            f"{fmt_tok(grand['cache_write']):>8} "
-            f"{fmt_tok(grand['cache_read']):>8} "
-            f"{fmt_tok(grand['output']):>8} "
-            f"${grand_cost:.4f}"
-        )
-
-
-def cmd_projects(args):
-    sessions = load_all_sessions()
-    from collections import Counter
-    counts = Counter(s["project"] for s in sessions)
-    print(f"{'Project':<45} {'Sessions':>8}")
-    print("-" * 55)
-    for project, count in counts.most_common():
-        print(f"{project:<45} {count:>8}")
-
-
-def main():
-    parser = argparse.ArgumentParser(description="Claude Code session viewer")
-    sub = parser.add_subparsers(dest="cmd")
-
-    p_list = sub.add_parser("list", help="List sessions")
-    p_list.add_argument("--date", help="Filter by date (YYYY-MM-DD)")
-    p_list.add_argument("--project", help="Filter by project name")
-
-    sub.add_parser("today", help="List today's sessions")
-
-    p_show = sub.add_parser("show", help="Show session messages")
-    p_show.add_argument("session_id", help="Session ID prefix (min 4 chars)")
-    p_show.add_argument("--limit", type=int, help="Max messages to show")
-
-    p_search = sub.add_parser("search", help="Search keyword across sessions")
-    p_search.add_argument("keyword", help="Keyword to search")
-    p_search.add_argument("--date", help="Limit to specific date (YYYY-MM-DD)")
-
-    sub.add_parser("projects", help="List all projects with session counts")
-
-    p_tokens = sub.add_parser("tokens", help="Token usage breakdown for a session")
-    p_tokens.add_argument("session_id", help="Session ID prefix")
-
-    p_cost = sub.add_parser("cost", help="Cost analysis across sessions")
-    p_cost.add_argument("--date", help="Filter by date (YYYY-MM-DD)")
-    p_cost.add_argument("--project", help="Filter by project name")
-
-    args = parser.parse_args()
-
-    dispatch = {
-        "list": cmd_list,
-        "today": cmd_today,
-        "show": cmd_show,
-        "search": cmd_search,
-        "projects": cmd_projects,
-        "tokens": cmd_tokens,
-        "cost": cmd_cost,
-    }
-
-    if args.cmd in dispatch:
-        dispatch[args.cmd](args)
-    else:
-        parser.print_help()
-
-
-if __name__ == "__main__":
-    main()
+#!/usr/bin/env python3
+"""
+Claude Code session viewer - query sessions from multiple dimensions.
+
+Usage:
+  sessions.py list [--date YYYY-MM-DD] [--project NAME]
+  sessions.py today
+  sessions.py show SESSION_ID [--limit N]
+  sessions.py search KEYWORD [--date YYYY-MM-DD]
+  sessions.py projects
+  sessions.py tokens SESSION_ID
+  sessions.py cost [--date YYYY-MM-DD] [--project NAME]
+"""
+
+# Sonnet 4.x pricing (USD per 1M tokens) — update if pricing changes
+PRICE = {
+    "input":          3.00,
+    "output":        15.00,
+    "cache_write":    3.75,
+    "cache_read":     0.30,
+}
+
+import json
+import mmap
+import os
+import pickle
+import re
+import sqlite3
+import sys
+import argparse
+from pathlib import Path
+from datetime import datetime, timedelta
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from orjson import loads as _loads
+except ImportError:  # optional speedup; stdlib json is the fallback
+    _loads = json.loads
+
+PROJECTS_DIR = Path.home() / ".claude" / "projects"
+
+# Session summaries are cached in SQLite keyed by (size, mtime), so repeat
+# invocations skip re-parsing unchanged JSONL files entirely.
+CACHE_DIR = Path.home() / ".cache" / "claude-session-viewer"
+CACHE_DB = CACHE_DIR / "sessions.db"
+INDEX_FILE = CACHE_DIR / "search.idx"
+USE_CACHE = True
+_cache_dirty = False
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    file_path        TEXT PRIMARY KEY,
+    size             INTEGER NOT NULL,
+    mtime_ns         INTEGER NOT NULL,
+    session_id       TEXT,
+    cwd              TEXT,
+    git_branch       TEXT,
+    start_time       TEXT,
+    end_time         TEXT,
+    message_count    INTEGER,
+    first_user_msg   TEXT,
+    first_user_found INTEGER,
+    tail_offset      INTEGER,
+    input_toks       INTEGER,
+    output_toks      INTEGER,
+    cache_write      INTEGER,
+    cache_read       INTEGER,
+    turns            INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_sessions_id ON sessions(session_id);
+CREATE INDEX IF NOT EXISTS idx_sessions_start ON sessions(start_time);
+"""
+
+
+def _connect() -> sqlite3.Connection:
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    con = sqlite3.connect(CACHE_DB)
+    con.executescript(_SCHEMA)
+    return con
+
+
+def _load_cache() -> dict:
+    if not USE_CACHE:
+        return {}
+    try:
+        with _connect() as con:
+            rows = con.execute("SELECT * FROM sessions").fetchall()
+    except sqlite3.Error:
+        return {}
+    cache = {}
+    for (path, size, mtime_ns, sid, cwd, branch, start, end, count,
+         first_msg, first_found, tail, inp, out, cw, cr, turns) in rows:
+        summary = None
+        if sid is not None:  # NULL session_id marks a known empty/bad file
+            summary = {
+                "session_id": sid,
+                "cwd": cwd,
+                "git_branch": branch,
+                "start_time": start,
+                "end_time": end,
+                "message_count": count,
+                "first_user_msg": first_msg,
+                "first_user_found": bool(first_found),
+                "usage": {"input": inp, "output": out, "cache_write": cw,
+                          "cache_read": cr, "turns": turns},
+                "tail_offset": tail,
+                "file": Path(path),
+            }
+        cache[path] = {"size": size, "mtime_ns": mtime_ns, "summary": summary}
+    return cache
+
+
+def _save_cache(cache: dict) -> None:
+    if not USE_CACHE:
+        return
+    rows = []
+    for path, ent in cache.items():
+        s = ent["summary"]
+        if s is None:
+            rows.append((path, ent["size"], ent["mtime_ns"]) + (None,) * 14)
+        else:
+            u = s["usage"]
+            rows.append((
+                path, ent["size"], ent["mtime_ns"], s["session_id"],
+                s["cwd"], s["git_branch"], s["start_time"], s["end_time"],
+                s["message_count"], s["first_user_msg"],
+                int(s["first_user_found"]), s["tail_offset"],
+                u["input"], u["output"], u["cache_write"], u["cache_read"],
+                u["turns"],
+            ))
+    try:
+        with _connect() as con:
+            con.executemany(
+                "INSERT OR REPLACE INTO sessions VALUES (%s)" % ",".join("?" * 17),
+                rows,
+            )
+    except sqlite3.Error:
+        pass
+
+
+def _new_summary(session_id: str, f: Path) -> dict:
+    return {
+        "session_id": session_id,
+        "cwd": "",
+        "git_branch": "",
+        "start_time": "",
+        "end_time": "",
+        "message_count": 0,
+        "first_user_msg": "",
+        "first_user_found": False,
+        "usage": {"input": 0, "output": 0, "cache_write": 0, "cache_read": 0, "turns": 0},
+        "tail_offset": 0,
+        "file": f,
+    }
+
+
+def _absorb_entry(state: dict, e: dict) -> None:
+    """Fold one JSONL entry into a summary state (usable incrementally)."""
+    t = e.get("type")
+    if t == "assistant":
+        usage = e.get("message", {}).get("usage")
+        if usage:
+            u = state["usage"]
+            u["input"]       += usage.get("input_tokens", 0)
+            u["output"]      += usage.get("output_tokens", 0)
+            u["cache_write"] += usage.get("cache_creation_input_tokens", 0)
+            u["cache_read"]  += usage.get("cache_read_input_tokens", 0)
+            u["turns"]       += 1
+    elif t != "user":
+        return
+    if state["message_count"] == 0:
+        state["cwd"] = e.get("cwd", "")
+        state["git_branch"] = e.get("gitBranch", "")
+        state["start_time"] = e.get("timestamp", "")
+    state["end_time"] = e.get("timestamp", "")
+    state["message_count"] += 1
+    if t == "user" and not state["first_user_found"]:
+        state["first_user_found"] = True
+        content = e.get("message", {}).get("content", "")
+        text = ""
+        if isinstance(content, list):
+            for c in content:
+                if isinstance(c, dict) and c.get("type") == "text":
+                    text = c["text"]
+                    break
+        elif isinstance(content, str):
+            text = content
+        state["first_user_msg"] = text[:120].replace("\n", " ")
+
+
+def parse_session_file(f: Path) -> "dict | None":
+    """Parse one session file into a summary dict.
+
+    Summaries deliberately do not carry the entry list: commands that only
+    print listings or totals never pay for materializing every entry dict,
+    and `load_entries` re-reads the file for the few that do.
+    """
+    state = _new_summary(f.stem, f)
+    try:
+        with open(f, "rb") as fh:
+            for line in fh:
+                line = line.strip()
+                if line:
+                    try:
+                        e = _loads(line)
+                    except ValueError:
+                        continue
+                    _absorb_entry(state, e)
+            state["tail_offset"] = fh.tell()
+    except Exception:
+        return None
+
+    if state["message_count"] == 0:
+        return None
+    return state
+
+
+def parse_session_tail(f: Path, summary: dict) -> "dict | None":
+    """Resume parsing an append-only session file from its cached offset."""
+    state = dict(summary)
+    state["usage"] = dict(summary["usage"])
+    try:
+        with open(f, "rb") as fh:
+            fh.seek(state["tail_offset"])
+            for line in fh:
+                line = line.strip()
+                if line:
+                    try:
+                        e = _loads(line)
+                    except ValueError:
+                        continue
+                    _absorb_entry(state, e)
+            state["tail_offset"] = fh.tell()
+    except OSError:
+        return None
+    if state["message_count"] == 0:
+        return None
+    return state
+
+
+def load_entries(session: dict) -> list[dict]:
+    """Parse a session's file into its full entry list on demand."""
+    entries = []
+    try:
+        with open(session["file"], "rb") as fh:
+            for line in fh:
+                line = line.strip()
+                if line:
+                    try:
+                        entries.append(_loads(line))
+                    except ValueError:
+                        pass
+    except OSError:
+        pass
+    return entries
+
+
+def _entry_text(e: dict) -> str:
+    content = e.get("message", {}).get("content", "")
+    if isinstance(content, list):
+        return " ".join(
+            c.get("text", "") for c in content
+            if isinstance(c, dict) and c.get("type") == "text"
+        )
+    return content or ""
+
+
+_TOKEN_RE = re.compile(r"[a-z0-9_]+")
+
+
+def _session_tokens(session: dict) -> frozenset:
+    tokens = set()
+    for e in load_entries(session):
+        if e.get("type") in ("user", "assistant"):
+            tokens.update(_TOKEN_RE.findall(_entry_text(e).lower()))
+    return frozenset(tokens)
+
+
+def build_search_index(sessions: list[dict]) -> dict:
+    """Per-file token sets for search, rebuilt only for changed files.
+
+    Persisted next to the summary cache so repeated searches skip reading
+    session files that cannot possibly match.
+    """
+    try:
+        with open(INDEX_FILE, "rb") as f:
+            old = pickle.load(f)
+    except (OSError, EOFError, pickle.PickleError):
+        old = {}
+    index = {}
+    dirty = False
+    for s in sessions:
+        key = str(s["file"])
+        try:
+            st = os.stat(key)
+        except OSError:
+            continue
+        hit = old.get(key)
+        if hit and hit["size"] == st.st_size and hit["mtime_ns"] == st.st_mtime_ns:
+            index[key] = hit
+            continue
+        index[key] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns,
+                      "tokens": _session_tokens(s)}
+        dirty = True
+    if dirty:
+        try:
+            CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            tmp = INDEX_FILE.with_suffix(".tmp")
+            with open(tmp, "wb") as f:
+                pickle.dump(index, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, INDEX_FILE)
+        except OSError:
+            pass
+    return index
+
+
+def _index_match(entry: dict, q_tokens: list[str]) -> bool:
+    """True when every query token occurs in (or inside) an indexed token.
+
+    The substring check keeps partial-word queries like "pars" working; the
+    caller still verifies the exact keyword against the narrowed sessions.
+    """
+    tokens = entry["tokens"]
+    return all(q in tokens or any(q in t for t in tokens) for q in q_tokens)
+
+
+def summarize_file(f: Path, project: str, cache: "dict | None" = None) -> "dict | None":
+    """Summarize one session file, going through the cache when possible.
+
+    Safe to call from worker threads: per-key dict assignment is atomic and
+    each file is handled by exactly one worker.
+    """
+    global _cache_dirty
+    try:
+        st = f.stat()
+    except OSError:
+        return None
+
+    key = str(f)
+    if cache is not None:
+        hit = cache.get(key)
+        if hit and hit["size"] == st.st_size and hit["mtime_ns"] == st.st_mtime_ns:
+            summary = hit["summary"]
+            if summary is None:
+                return None  # known empty/unparsable file
+            s = dict(summary)
+            s["project"] = project
+            s["file"] = f
+            return s
+        # The file grew in place: absorb only the appended lines instead
+        # of re-reading it. A shrunk file means rotation/truncation and
+        # falls through to a full reparse.
+        if (hit and hit["summary"] is not None
+                and st.st_size > hit["summary"].get("tail_offset", st.st_size)):
+            s = parse_session_tail(f, hit["summary"])
+            if s is not None:
+                stored = {k: v for k, v in s.items() if k != "project"}
+                cache[key] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "summary": stored}
+                _cache_dirty = True
+                s["project"] = project
+                s["file"] = f
+                return s
+
+    s = parse_session_file(f)
+    if cache is not None:
+        stored = None
+        if s is not None:
+            stored = {k: v for k, v in s.items() if k != "project"}
+        cache[key] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "summary": stored}
+        _cache_dirty = True
+    if s is None:
+        return None
+    s["project"] = project
+    return s
+
+
+def load_one_session(prefix: str) -> "dict | None":
+    """Resolve a session by id prefix by globbing for its file directly.
+
+    show/tokens only ever need one session, so this skips parsing every
+    other file in every project.
+    """
+    global _cache_dirty
+    cache = _load_cache()
+    _cache_dirty = False
+    for f in PROJECTS_DIR.glob(f"*/{prefix}*.jsonl"):
+        s = summarize_file(f, f.parent.name, cache)
+        if s is not None:
+            if _cache_dirty:
+                _save_cache(cache)
+            return s
+    if _cache_dirty:
+        _save_cache(cache)
+    return None
+
+
+@lru_cache(maxsize=1)
+def load_all_sessions() -> list[dict]:
+    global _cache_dirty
+    if not PROJECTS_DIR.exists():
+        return []
+    cache = _load_cache()
+    _cache_dirty = False
+    work = [
+        (f, project_dir.name)
+        for project_dir in PROJECTS_DIR.iterdir() if project_dir.is_dir()
+        for f in project_dir.glob("*.jsonl")
+    ]
+    # Fan out across files on cold-cache runs; the pool is not worth its
+    # startup cost for a handful of files.
+    if len(work) >= 16:
+        with ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 4)) as ex:
+            results = list(ex.map(lambda w: summarize_file(w[0], w[1], cache), work))
+    else:
+        results = [summarize_file(f, project, cache) for f, project in work]
+    sessions = [s for s in results if s is not None]
+    if _cache_dirty:
+        _save_cache(cache)
+    sessions.sort(key=lambda s: s["start_time"], reverse=True)
+    return sessions
+
+
+# Resolved once: .astimezone() with no argument re-derives the local
+# timezone on every call, and these run per session per listing.
+LOCAL_TZ = datetime.now().astimezone().tzinfo
+
+
+def format_time(iso: str) -> str:
+    if not iso:
+        return "-"
+    try:
+        # Python 3.11+ fromisoformat accepts the trailing Z directly
+        dt = datetime.fromisoformat(iso).astimezone(LOCAL_TZ)
+        return dt.strftime("%m-%d %H:%M")
+    except Exception:
+        return iso[:16]
+
+
+def filter_by_date(sessions: list[dict], date_str: str) -> list[dict]:
+    try:
+        target = datetime.strptime(date_str, "%Y-%m-%d").date()
+    except ValueError:
+        print(f"Invalid date format: {date_str}. Use YYYY-MM-DD.")
+        sys.exit(1)
+    # Timestamps are ISO-8601 UTC, so the string prefix is the UTC date.
+    # Only sessions within a day of the target can land on it after the
+    # local-tz conversion; everything else is rejected without parsing.
+    near = {(target + timedelta(days=d)).isoformat() for d in (-1, 0, 1)}
+    result = []
+    for s in sessions:
+        start = s["start_time"]
+        if not start or start[:10] not in near:
+            continue
+        try:
+            if datetime.fromisoformat(start).astimezone(LOCAL_TZ).date() == target:
+                result.append(s)
+        except Exception:
+            pass
+    return result
+
+
+def filter_by_project(sessions: list[dict], project: str) -> list[dict]:
+    return [s for s in sessions if project.lower() in s["project"].lower()]
+
+
+def cmd_list(args):
+    sessions = load_all_sessions()
+    if args.date:
+        sessions = filter_by_date(sessions, args.date)
+    if args.project:
+        sessions = filter_by_project(sessions, args.project)
+
+    if not sessions:
+        print("No sessions found.")
+        return
+
+    print(f"{'Time':<12} {'Session ID':<10} {'Branch':<16} {'Msgs':>4}  {'First message'}")
+    print("-" * 90)
+    for s in sessions:
+        sid = s["session_id"][:8]
+        branch = (s["git_branch"] or "-")[:15]
+        msg = s["first_user_msg"][:50]
+        print(f"{format_time(s['start_time']):<12} {sid:<10} {branch:<16} {s['message_count']:>4}  {msg}")
+        # Show project as sub-line if no filter
+        if not args.project:
+            print(f"{'':12} project: {s['project']}")
+
+
+def cmd_today(args):
+    today = datetime.now().strftime("%Y-%m-%d")
+    args.date = today
+    args.project = None
+    cmd_list(args)
+
+
+def cmd_show(args):
+    s = load_one_session(args.session_id)
+    if s is None:
+        print(f"Session not found: {args.session_id}")
+        sys.exit(1)
+
+    print(f"Session : {s['session_id']}")
+    print(f"Project : {s['project']}")
+    print(f"Branch  : {s['git_branch'] or '-'}")
+    print(f"Time    : {format_time(s['start_time'])} → {format_time(s['end_time'])}")
+    print(f"Messages: {s['message_count']}")
+    print("=" * 80)
+
+    messages = [e for e in load_entries(s) if e.get("type") in ("user", "assistant")]
+    limit = args.limit if args.limit else len(messages)
+    for e in messages[:limit]:
+        role = e.get("type", "?").upper()
+        content = e.get("message", {}).get("content", "")
+        if isinstance(content, list):
+            parts = []
+            for c in content:
+                if isinstance(c, dict):
+                    if c.get("type") == "text":
+                        parts.append(c["text"])
+                    elif c.get("type") == "tool_use":
+                        parts.append(f"[tool: {c.get('name')}]")
+            text = " ".join(parts)
+        else:
+            text = content or ""
+
+        text = text.strip().replace("\n", " ")[:300]
+        ts = format_time(e.get("timestamp", ""))
+        print(f"[{ts}] {role}: {text}")
+
+
+def cmd_search(args):
+    keyword = args.keyword.lower()
+    sessions = load_all_sessions()
+    if args.date:
+        sessions = filter_by_date(sessions, args.date)
+
+    # Narrow candidates through the persisted token index; the scan below
+    # still verifies the exact substring on whatever survives.
+    q_tokens = _TOKEN_RE.findall(keyword)
+    index = build_search_index(sessions) if USE_CACHE and q_tokens else {}
+
+    # Raw-bytes prefilter: a C-level regex pass over the mmapped file is far
+    # cheaper than parsing it. Only sound for keywords that appear verbatim
+    # in the JSON (ASCII, nothing the encoder would escape).
+    raw_pat = None
+    if keyword.isascii() and '"' not in keyword and "\\" not in keyword:
+        raw_pat = re.compile(re.escape(keyword).encode(), re.IGNORECASE)
+
+    found = 0
+    for s in sessions:
+        entry = index.get(str(s["file"]))
+        if entry is not None and not _index_match(entry, q_tokens):
+            continue
+        if raw_pat is not None:
+            try:
+                with open(s["file"], "rb") as fh, \
+                        mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    if raw_pat.search(mm) is None:
+                        continue
+            except (OSError, ValueError):
+                pass
+        hits = []
+        for e in load_entries(s):
+            if e.get("type") not in ("user", "assistant"):
+                continue
+            text = _entry_text(e)
+            if keyword in text.lower():
+                snippet = text.strip().replace("\n", " ")
+                idx = snippet.lower().find(keyword)
+                start = max(0, idx - 40)
+                hits.append(f"  ...{snippet[start:start+120]}...")
+
+        if hits:
+            found += 1
+            print(f"\n[{format_time(s['start_time'])}] {s['session_id'][:8]} | {s['project']}")
+            print(f"  {s['first_user_msg'][:80]}")
+            for h in hits[:3]:
+                print(h)
+
+    if found == 0:
+        print(f"No sessions found containing: {args.keyword}")
+    else:
+        print(f"\n--- Found in {found} session(s) ---")
+
+
+def calc_cost(u: dict) -> float:
+    return (
+        u["input"]       / 1_000_000 * PRICE["input"] +
+        u["output"]      / 1_000_000 * PRICE["output"] +
+        u["cache_write"] / 1_000_000 * PRICE["cache_write"] +
+        u["cache_read"]  / 1_000_000 * PRICE["cache_read"]
+    )
+
+
+def fmt_tok(n: int) -> str:
+    if n >= 1_000_000:
+        return f"{n/1_000_000:.2f}M"
+    if n >= 1_000:
+        return f"{n/1_000:.1f}K"
+    return str(n)
+
+
+def cache_hit_rate(u: dict) -> str:
+    total_in = u["input"] + u["cache_write"] + u["cache_read"]
+    if total_in == 0:
+        return "N/A"
+    return f"{u['cache_read'] / total_in * 100:.1f}%"
+
+
+def cmd_tokens(args):
+    s = load_one_session(args.session_id)
+    if s is None:
+        print(f"Session not found: {args.session_id}")
+        sys.exit(1)
+
+    u = s["usage"]
+    cost = calc_cost(u)
+    total_in = u["input"] + u["cache_write"] + u["cache_read"]
+
+    print(f"Session : {s['session_id']}")
+    print(f"Project : {s['project']}")
+    print(f"Time    : {format_time(s['start_time'])} → {format_time(s['end_time'])}")
+    print(f"Turns   : {u['turns']}")
+    print()
+    print(f"{'Token breakdown':}")
+    print(f"  Input (non-cached) : {fmt_tok(u['input']):>10}   ${u['input']/1e6*PRICE['input']:.4f}")
+    print(f"  Cache write        : {fmt_tok(u['cache_write']):>10}   ${u['cache_write']/1e6*PRICE['cache_write']:.4f}")
+    print(f"  Cache read         : {fmt_tok(u['cache_read']):>10}   ${u['cache_read']/1e6*PRICE['cache_read']:.4f}")
+    print(f"  Output             : {fmt_tok(u['output']):>10}   ${u['output']/1e6*PRICE['output']:.4f}")
+    print(f"  {'─'*40}")
+    print(f"  Total input        : {fmt_tok(total_in):>10}")
+    print(f"  Cache hit rate     : {cache_hit_rate(u):>10}")
+    print(f"  Estimated cost     : {'$' + f'{cost:.4f}':>10}")
+
+
+def cmd_cost(args):
+    sessions = load_all_sessions()
+    if args.date:
+        sessions = filter_by_date(sessions, args.date)
+    if args.project:
+        sessions = filter_by_project(sessions, args.project)
+
+    if not sessions:
+        print("No sessions found.")
+        return
+
+    print(f"{'Time':<12} {'Session':<10} {'Turns':>5} {'CacheHit':>9} {'Input':>8} {'CacheW':>8} {'CacheR':>8} {'Output':>8} {'Cost':>8}")
+    print("-" * 100)
+
+    grand = {"input": 0, "output": 0, "cache_write": 0, "cache_read": 0, "turns": 0}
+    for s in sessions:
+        u = s["usage"]
+        cost = calc_cost(u)
+        for k in grand:
+            grand[k] += u[k]
+        print(
+            f"{format_time(s['start_time']):<12} "
+            f"{s['session_id'][:8]:<10} "
+            f"{u['turns']:>5} "
+            f"{cache_hit_rate(u):>9} "
+            f"{fmt_tok(u['input']):>8} "
+            f"{fmt_tok(u['cache_write']):>8} "
+            f"{fmt_tok(u['cache_read']):>8} "
+            f"{fmt_tok(u['output']):>8} "
+            f"${cost:.4f}"
+        )
+
+    if len(sessions) > 1:
+        grand_cost = calc_cost(grand)
+        print("-" * 100)
+        print(
+            f"{'TOTAL':<12} "
+            f"{len(sessions)} sessions"
+            f"{grand['turns']:>14} "
+            f"{cache_hit_rate(grand):>9} "
+            f"{fmt_tok(grand['input']):>8} "
+            f"{fmt_tok(grand['cache_write']):>8} "
+            f"{fmt_tok(grand['cache_read']):>8} "
+            f"{fmt_tok(grand['output']):>8} "
+            f"${grand_cost:.4f}"
+        )
+
+
+def cmd_projects(args):
+    sessions = load_all_sessions()
+    from collections import Counter
+    counts = Counter(s["project"] for s in sessions)
+    print(f"{'Project':<45} {'Sessions':>8}")
+    print("-" * 55)
+    for project, count in counts.most_common():
+        print(f"{project:<45} {count:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Claude Code session viewer")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Ignore the on-disk session summary cache")
+    sub = parser.add_subparsers(dest="cmd")
+
+    p_list = sub.add_parser("list", help="List sessions")
+    p_list.add_argument("--date", help="Filter by date (YYYY-MM-DD)")
+    p_list.add_argument("--project", help="Filter by project name")
+
+    sub.add_parser("today", help="List today's sessions")
+
+    p_show = sub.add_parser("show", help="Show session messages")
+    p_show.add_argument("session_id", help="Session ID prefix (min 4 chars)")
+    p_show.add_argument("--limit", type=int, help="Max messages to show")
+
+    p_search = sub.add_parser("search", help="Search keyword across sessions")
+    p_search.add_argument("keyword", help="Keyword to search")
+    p_search.add_argument("--date", help="Limit to specific date (YYYY-MM-DD)")
+
+    sub.add_parser("projects", help="List all projects with session counts")
+
+    p_tokens = sub.add_parser("tokens", help="Token usage breakdown for a session")
+    p_tokens.add_argument("session_id", help="Session ID prefix")
+
+    p_cost = sub.add_parser("cost", help="Cost analysis across sessions")
+    p_cost.add_argument("--date", help="Filter by date (YYYY-MM-DD)")
+    p_cost.add_argument("--project", help="Filter by project name")
+
+    args = parser.parse_args()
+
+    global USE_CACHE
+    USE_CACHE = not args.no_cache
+
+    dispatch = {
+        "list": cmd_list,
+        "today": cmd_today,
+        "show": cmd_show,
+        "search": cmd_search,
+        "projects": cmd_projects,
+        "tokens": cmd_tokens,
+        "cost": cmd_cost,
+    }
+
+    if args.cmd in dispatch:
+        dispatch[args.cmd](args)
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,12 @@
 #!/usr/bin/env python3
 """Sync skills from /root/ai/skills/my/ to ~/.claude/skills/"""
 
+import os
 import re
 import shutil
+import stat
 import sys
+from fnmatch import fnmatch
 from pathlib import Path
 
 SRC = Path(__file__).parent.parent.parent
@@ -11,6 +14,8 @@ DST = Path.home() / ".claude/skills"
 PROMPT_SRC = SRC.parent / "prompt" / "CLAUDE.md"
 PROMPT_DST = Path.home() / ".claude" / "prompt" / "CLAUDE.md"
 
+IGNORE_PATTERNS = ("__pycache__", "*.pyc", ".DS_Store", "*.skill")
+
 # Sections managed by sync (these will be updated from source)
 MANAGED_SECTIONS = ["## Projects", "## 项目", "## 常用工具", "## 工具", "## 其他"]
 
@@ -66,6 +71,60 @@ def merge_claude_md(source_content: str, target_content: str) -> str:
     return "\n".join(lines)
 
 
+def _ignored(name: str) -> bool:
+    return any(fnmatch(name, pat) for pat in IGNORE_PATTERNS)
+
+
+def _place_file(src: Path, dst: Path) -> None:
+    """Hardlink when the filesystem allows it (zero data copy), else copy."""
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def sync_tree(src_dir: Path, dst_dir: Path) -> None:
+    """Mirror src_dir into dst_dir, touching only files that changed.
+
+    Unchanged files — same size and mtime — cost a stat instead of a
+    delete-and-rewrite; stale destination files are removed.
+    """
+    dst_dir.mkdir(parents=True, exist_ok=True)
+    src_names = set()
+    for entry in os.scandir(src_dir):
+        if _ignored(entry.name):
+            continue
+        src_names.add(entry.name)
+        target = dst_dir / entry.name
+        if entry.is_dir(follow_symlinks=False):
+            if target.exists() and not target.is_dir():
+                target.unlink()
+            sync_tree(Path(entry.path), target)
+            continue
+        st = entry.stat()
+        try:
+            dt = target.stat()
+            if stat.S_ISDIR(dt.st_mode):
+                # was a directory in a previous sync, now a file in source
+                shutil.rmtree(target)
+            elif dt.st_size == st.st_size and dt.st_mtime_ns == st.st_mtime_ns:
+                continue
+            else:
+                target.unlink()
+        except FileNotFoundError:
+            pass
+        _place_file(Path(entry.path), target)
+
+    # Drop whatever no longer exists in (or is now ignored by) the source
+    for entry in os.scandir(dst_dir):
+        if entry.name in src_names:
+            continue
+        if entry.is_dir(follow_symlinks=False):
+            shutil.rmtree(entry.path)
+        else:
+            os.unlink(entry.path)
+
+
 def sync():
     DST.mkdir(parents=True, exist_ok=True)
     synced = []
@@ -76,10 +135,7 @@ def sync():
         if not (skill_dir / "SKILL.md").exists():
             continue
 
-        dest = DST / skill_dir.name
-        if dest.exists():
-            shutil.rmtree(dest)
-        shutil.copytree(skill_dir, dest, ignore=shutil.ignore_patterns("__pycache__", "*.pyc", ".DS_Store", "*.skill"))
+        sync_tree(skill_dir, DST / skill_dir.name)
         synced.append(skill_dir.name)
 
     print(f"Synced {len(synced)} skills to {DST}:")
@@ -3,41 +3,168 @@
 Query and analyze Claude Code tool call logs.
 """
 
+import heapq
 import json
+import mmap
+import os
+import pickle
 import sys
 from pathlib import Path
 from datetime import datetime
-from collections import defaultdict
-from typing import List, Dict, Any
+from collections import defaultdict, deque
+from itertools import groupby, islice
+from typing import Any, Dict, Iterable, Iterator, List
+
+try:
+    import orjson
+except ImportError:  # optional speedup; stdlib json is the fallback
+    orjson = None
+
+try:
+    import numpy as np
+except ImportError:  # optional; the pure-Python fallback works everywhere
+    np = None
 
 LOG_FILE = Path.home() / ".claude" / "tool_calls.log"
 
+# Parsed entries are cached next to the log keyed by (size, mtime); when
+# the log only grew, just the appended slice is parsed on the next run.
+CACHE_FILE = LOG_FILE.with_suffix(".cache")
+
+
+def _parse_lines(raw: bytes) -> List[Dict[str, Any]]:
+    lines = [line for line in raw.split(b'\n') if line.strip()]
+    loads = orjson.loads if orjson is not None else json.loads
+
+    # Parse everything as one JSON array to amortize per-call parser
+    # overhead; any malformed line drops us to the per-line loop, which
+    # keeps the old skip-bad-lines behavior.
+    try:
+        return loads(b'[' + b','.join(lines) + b']')
+    except ValueError:
+        pass
+
+    logs = []
+    for line in lines:
+        try:
+            logs.append(loads(line))
+        except ValueError:
+            continue
+    return logs
+
+
+def _save_cache(st: os.stat_result, logs: List[Dict[str, Any]]) -> None:
+    try:
+        tmp = CACHE_FILE.with_suffix(".tmp")
+        with open(tmp, 'wb') as f:
+            pickle.dump(
+                {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "logs": logs},
+                f, protocol=pickle.HIGHEST_PROTOCOL,
+            )
+        os.replace(tmp, CACHE_FILE)
+    except OSError:
+        pass
+
 
 def load_logs() -> List[Dict[str, Any]]:
     """Load all log entries from the log file."""
-    if not LOG_FILE.exists():
+    try:
+        st = os.stat(LOG_FILE)
+    except OSError:
         return []
 
-    logs = []
-    with open(LOG_FILE, 'r') as f:
+    try:
+        with open(CACHE_FILE, 'rb') as f:
+            cached = pickle.load(f)
+    except (OSError, EOFError, pickle.PickleError):
+        cached = None
+
+    if cached:
+        if cached["size"] == st.st_size and cached["mtime_ns"] == st.st_mtime_ns:
+            return cached["logs"]
+        if 0 < cached["size"] < st.st_size:
+            # The log grew in place: parse only the appended slice. A
+            # shrunk file means rotation and takes the full parse below.
+            logs = cached["logs"]
+            with open(LOG_FILE, 'rb') as f:
+                f.seek(cached["size"])
+                logs.extend(_parse_lines(f.read()))
+            _save_cache(st, logs)
+            return logs
+
+    with open(LOG_FILE, 'rb') as f:
+        logs = _parse_lines(f.read())
+    _save_cache(st, logs)
+    return logs
+
+
+def iter_logs() -> Iterator[Dict[str, Any]]:
+    """Yield log entries lazily.
+
+    Serves from the sidecar cache when it is current; otherwise parses
+    line by line without materializing the whole file, so consumers that
+    keep only a window (recent, filter) stay O(output) in memory.
+    """
+    try:
+        st = os.stat(LOG_FILE)
+    except OSError:
+        return
+
+    try:
+        with open(CACHE_FILE, 'rb') as f:
+            cached = pickle.load(f)
+    except (OSError, EOFError, pickle.PickleError):
+        cached = None
+    if cached and cached["size"] == st.st_size and cached["mtime_ns"] == st.st_mtime_ns:
+        yield from cached["logs"]
+        return
+
+    loads = orjson.loads if orjson is not None else json.loads
+    with open(LOG_FILE, 'rb') as f:
         for line in f:
-            line = line.strip()
-            if line:
+            if line.strip():
                 try:
-                    logs.append(json.loads(line))
-                except json.JSONDecodeError:
+                    yield loads(line)
+                except ValueError:
                     continue
+
+
+def tail_logs(n: int) -> List[Dict[str, Any]]:
+    """Parse only the last n log lines, in chronological order.
+
+    Scans the mmapped file backward for newlines, so the bytes touched
+    scale with n rather than the file size.
+    """
+    loads = orjson.loads if orjson is not None else json.loads
+    logs = []
+    try:
+        with open(LOG_FILE, 'rb') as f, \
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            pos = len(mm)
+            while pos > 0 and len(logs) < n:
+                nl = mm.rfind(b'\n', 0, pos)
+                line = mm[nl + 1:pos].strip()  # nl == -1 starts at offset 0
+                pos = nl if nl != -1 else 0
+                if line:
+                    try:
+                        logs.append(loads(line))
+                    except ValueError:
+                        continue
+    except (OSError, ValueError):
+        return []
+    logs.reverse()
     return logs
 
 
 def format_duration(ms: float) -> str:
     """Format duration in a human-readable way."""
+    # Sub-second is by far the hottest branch; log durations are usually
+    # integers, which skip float rounding entirely
     if ms < 1000:
-        return f"{ms:.0f}ms"
-    elif ms < 60000:
-        return f"{ms/1000:.2f}s"
-    else:
-        return f"{ms/60000:.1f}m"
+        return f"{ms}ms" if type(ms) is int else f"{ms:.0f}ms"
+    if ms < 60000:
+        return f"{ms / 1000:.2f}s"
+    return f"{ms / 60000:.1f}m"
 
 
 def show_summary(logs: List[Dict[str, Any]]):
@@ -46,16 +173,32 @@ def show_summary(logs: List[Dict[str, Any]]):
         print("No tool calls recorded yet.")
         return
 
-    # Calculate statistics
-    tool_stats = defaultdict(lambda: {"count": 0, "total_time": 0, "times": []})
-
-    for log in logs:
-        tool = log.get("tool_name", "unknown")
-        duration = log.get("duration_ms", 0)
-
-        tool_stats[tool]["count"] += 1
-        tool_stats[tool]["total_time"] += duration
-        tool_stats[tool]["times"].append(duration)
+    # Calculate statistics: (tool, count, total) rows sorted by count
+    if np is not None:
+        # Vectorized reduction: unique + bincount run in C over parallel
+        # arrays instead of a Python dict loop
+        tools = [log.get("tool_name", "unknown") for log in logs]
+        durs = np.fromiter(
+            (log.get("duration_ms", 0) for log in logs),
+            dtype=np.float64, count=len(logs),
+        )
+        names, inv = np.unique(np.asarray(tools), return_inverse=True)
+        counts = np.bincount(inv)
+        totals = np.bincount(inv, weights=durs)
+        order = np.argsort(counts)[::-1]
+        rows = [(str(names[i]), int(counts[i]), float(totals[i])) for i in order]
+    else:
+        # [count, total] pairs: one lookup per entry, and no per-call
+        # duration list is retained (nothing ever read it)
+        tool_stats = defaultdict(lambda: [0, 0.0])
+        for log in logs:
+            s = tool_stats[log.get("tool_name", "unknown")]
+            s[0] += 1
+            s[1] += log.get("duration_ms", 0)
+        rows = sorted(
+            ((t, s[0], s[1]) for t, s in tool_stats.items()),
+            key=lambda x: x[1], reverse=True,
+        )
 
     # Print summary
     print(f"\n{'='*70}")
@@ -65,24 +208,20 @@ def show_summary(logs: List[Dict[str, Any]]):
     print(f"{'Tool Name':<20} {'Count':>8} {'Avg Time':>12} {'Total Time':>15}")
     print(f"{'-'*70}")
 
-    # Sort by count
-    sorted_tools = sorted(tool_stats.items(), key=lambda x: x[1]["count"], reverse=True)
-
-    for tool, stats in sorted_tools:
-        avg_time = stats["total_time"] / stats["count"]
-        print(f"{tool:<20} {stats['count']:>8} {format_duration(avg_time):>12} {format_duration(stats['total_time']):>15}")
+    for tool, count, total_time in rows:
+        print(f"{tool:<20} {count:>8} {format_duration(total_time / count):>12} {format_duration(total_time):>15}")
 
     print(f"\n{'='*70}\n")
 
 
-def show_recent(logs: List[Dict[str, Any]], limit: int = 10):
+def show_recent(logs: Iterable[Dict[str, Any]], limit: int = 10):
     """Show recent tool calls."""
-    if not logs:
+    # Bounded window: streams the input and never holds more than `limit`
+    recent = deque(logs, maxlen=limit)
+    if not recent:
         print("No tool calls recorded yet.")
         return
 
-    recent = logs[-limit:]
-
     print(f"\n{'='*70}")
     print(f"Recent {len(recent)} Tool Calls")
     print(f"{'='*70}\n")
@@ -97,23 +236,26 @@ def show_recent(logs: List[Dict[str, Any]], limit: int = 10):
     print(f"\n{'='*70}\n")
 
 
-def show_detail(logs: List[Dict[str, Any]], index: int = -1):
-    """Show detailed information for a specific call."""
-    if not logs:
-        print("No tool calls recorded yet.")
-        return
+def show_detail(index: int = -1):
+    """Show detailed information for a specific call.
 
-    if index < 0:
-        index = len(logs) + index
+    A non-negative index reads the file only up to that entry; a negative
+    one goes through the tail reader — neither loads the whole log.
+    """
+    if index >= 0:
+        log = next(islice(iter_logs(), index, index + 1), None)
+        label = f"#{index + 1}"
+    else:
+        tail = tail_logs(-index)
+        log = tail[0] if len(tail) == -index else None
+        label = f"{index} from end"
 
-    if index < 0 or index >= len(logs):
-        print(f"Invalid index: {index}. Valid range: 0-{len(logs)-1}")
+    if log is None:
+        print(f"Invalid index: {index}. No such entry in the log.")
         return
 
-    log = logs[index]
-
     print(f"\n{'='*70}")
-    print(f"Tool Call Detail (#{index + 1})")
+    print(f"Tool Call Detail ({label})")
     print(f"{'='*70}\n")
 
     print(f"Timestamp:    {log.get('timestamp', 'N/A')}")
@@ -139,48 +281,56 @@ def show_detail(logs: List[Dict[str, Any]], index: int = -1):
     print(f"\n{'='*70}\n")
 
 
-def filter_by_tool(logs: List[Dict[str, Any]], tool_name: str):
+def filter_by_tool(logs: Iterable[Dict[str, Any]], tool_name: str):
     """Filter logs by tool name."""
-    filtered = [log for log in logs if log.get("tool_name", "").lower() == tool_name.lower()]
+    # Single streaming pass: collect the output lines and running stats
+    # instead of materializing the filtered entries
+    target = tool_name.lower()
+    lines = []
+    total = 0
+    min_duration = max_duration = None
 
-    if not filtered:
+    for log in logs:
+        if log.get("tool_name", "").lower() != target:
+            continue
+        duration = log.get("duration_ms", 0)
+        total += duration
+        if min_duration is None or duration < min_duration:
+            min_duration = duration
+        if max_duration is None or duration > max_duration:
+            max_duration = duration
+        timestamp = log.get("timestamp", "N/A")
+        lines.append(f"{len(lines) + 1}. [{timestamp}] {format_duration(duration)}")
+
+    if not lines:
         print(f"No calls found for tool: {tool_name}")
         return
 
     print(f"\n{'='*70}")
-    print(f"Tool Calls for: {tool_name} ({len(filtered)} calls)")
+    print(f"Tool Calls for: {tool_name} ({len(lines)} calls)")
     print(f"{'='*70}\n")
 
-    for i, log in enumerate(filtered, 1):
-        timestamp = log.get("timestamp", "N/A")
-        duration = log.get("duration_ms", 0)
-
-        print(f"{i}. [{timestamp}] {format_duration(duration)}")
-
-    # Show statistics
-    durations = [log.get("duration_ms", 0) for log in filtered]
-    avg_duration = sum(durations) / len(durations)
-    min_duration = min(durations)
-    max_duration = max(durations)
+    for line in lines:
+        print(line)
 
     print(f"\nStatistics:")
-    print(f"  Total Calls: {len(filtered)}")
-    print(f"  Avg Time:    {format_duration(avg_duration)}")
+    print(f"  Total Calls: {len(lines)}")
+    print(f"  Avg Time:    {format_duration(total / len(lines))}")
     print(f"  Min Time:    {format_duration(min_duration)}")
     print(f"  Max Time:    {format_duration(max_duration)}")
 
     print(f"\n{'='*70}\n")
 
 
-def show_slow_calls(logs: List[Dict[str, Any]], threshold_ms: float = 1000, limit: int = 10):
+def show_slow_calls(logs: Iterable[Dict[str, Any]], threshold_ms: float = 1000, limit: int = 10):
     """Show slowest tool calls."""
-    if not logs:
-        print("No tool calls recorded yet.")
-        return
-
-    # Sort by duration
-    sorted_logs = sorted(logs, key=lambda x: x.get("duration_ms", 0), reverse=True)
-    slow_calls = [log for log in sorted_logs if log.get("duration_ms", 0) >= threshold_ms][:limit]
+    # Filter while streaming, then keep only a limit-sized heap —
+    # O(N log limit) instead of sorting every entry
+    slow_calls = heapq.nlargest(
+        limit,
+        (log for log in logs if log.get("duration_ms", 0) >= threshold_ms),
+        key=lambda x: x.get("duration_ms", 0),
+    )
 
     if not slow_calls:
         print(f"No calls slower than {format_duration(threshold_ms)} found.")
@@ -215,13 +365,15 @@ def filter_by_project(logs: List[Dict[str, Any]], project_path: str):
     print(f"Tool Calls in Project: {project_path} ({len(filtered)} calls)")
     print(f"{'='*70}\n")
 
-    # Group by working directory
-    by_cwd = defaultdict(list)
-    for log in filtered:
-        cwd = log.get("cwd", "unknown")
-        by_cwd[cwd].append(log)
+    # Sort by working directory and print each group as it streams by;
+    # no second copy of every entry inside a dict of lists
+    cwd_key = lambda log: log.get("cwd", "unknown")
+    filtered.sort(key=cwd_key)
 
-    for cwd, cwd_logs in sorted(by_cwd.items()):
+    total_time = 0
+    dir_count = 0
+    for cwd, cwd_logs in groupby(filtered, key=cwd_key):
+        dir_count += 1
         print(f"\nWorking Directory: {cwd}")
         print(f"{'-'*70}")
 
@@ -229,18 +381,15 @@ def filter_by_project(logs: List[Dict[str, Any]], project_path: str):
             timestamp = log.get("timestamp", "N/A")
             tool = log.get("tool_name", "unknown")
             duration = log.get("duration_ms", 0)
+            total_time += duration
 
             print(f"  {i}. [{timestamp}] {tool} - {format_duration(duration)}")
 
-    # Show statistics
-    durations = [log.get("duration_ms", 0) for log in filtered]
-    avg_duration = sum(durations) / len(durations) if durations else 0
-
     print(f"\n{'='*70}")
     print(f"Statistics:")
     print(f"  Total Calls: {len(filtered)}")
-    print(f"  Avg Time:    {format_duration(avg_duration)}")
-    print(f"  Directories: {len(by_cwd)}")
+    print(f"  Avg Time:    {format_duration(total_time / len(filtered))}")
+    print(f"  Directories: {dir_count}")
 
     print(f"\n{'='*70}\n")
 
@@ -265,29 +414,29 @@ def main():
         sys.exit(1)
 
     command = sys.argv[1].lower()
-    logs = load_logs()
 
+    # Streaming commands iterate lazily; the rest get the cached list
     if command == "summary":
-        show_summary(logs)
+        show_summary(load_logs())
     elif command == "recent":
         limit = int(sys.argv[2]) if len(sys.argv) > 2 else 10
-        show_recent(logs, limit)
+        show_recent(tail_logs(limit), limit)
     elif command == "detail":
         index = int(sys.argv[2]) if len(sys.argv) > 2 else -1
-        show_detail(logs, index)
+        show_detail(index)
     elif command == "filter":
         if len(sys.argv) < 3:
             print("Error: filter command requires a tool name")
             sys.exit(1)
-        filter_by_tool(logs, sys.argv[2])
+        filter_by_tool(iter_logs(), sys.argv[2])
     elif command == "project":
         if len(sys.argv) < 3:
             print("Error: project command requires a path")
             sys.exit(1)
-        filter_by_project(logs, sys.argv[2])
+        filter_by_project(load_logs(), sys.argv[2])
     elif command == "slow":
         threshold = float(sys.argv[2]) if len(sys.argv) > 2 else 1000
-        show_slow_calls(logs, threshold)
+        show_slow_calls(iter_logs(), threshold)
     else:
         print(f"Unknown command: {command}")
         sys.exit(1)